@@ -17,16 +17,28 @@ This module manages MySQL primitives.
 
 import os
 import logging
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import sqlparse
 from sqlalchemy import create_engine, text, select, func, MetaData, Table
 from sqlalchemy.exc import DatabaseError, InterfaceError, DataError,\
     OperationalError,IntegrityError,InternalError,ProgrammingError,\
     NotSupportedError
 import pandas as pd
+from pandas.io.sql import SQLDatabase, SQLTable
 
 logging.basicConfig(level=logging.INFO)
 LOGGER = logging.getLogger(__name__)
 
+# CSV dialect shared by the writer and the LOAD DATA statement
+FIELD_SEP = ';'
+QUOTE_CHAR = '"'
+LINE_TERMINATOR = '\n'
+NULL_VALUE = '\\N'
+CHARACTER_SET = 'utf8mb4'  # MySQL name of the UTF-8 encoding of the file
+
 
 class MySQL:
     """
@@ -166,11 +178,14 @@ class MySQL:
         # sql keywords/identifiers.
 
     def insert(self, data_table, if_exists='fail',
-               columns=['*'], schema=None, rm_tmp=True):
+               columns=['*'], schema=None, rm_tmp=True, chunksize=None,
+               parallel=None, errors=None, spool_dir=None):
         r"""
         Insert a dataframe into a table.
 
-        Converts the dataframe to CSV format and bulk loads it.
+        Creates the table structure if needed and bulk loads the dataframe
+        with LOAD DATA. Where named pipes are available, the CSV serialization
+        is streamed to the server through a pipe instead of a file on disk.
 
         Args:
           data_table(Dataframe): dataframe with the data to load.
@@ -184,51 +199,55 @@ class MySQL:
                          table. Defaults to ['*'] (all columns).
           schema (string): name of the database that contains the
                            destination table.
-          rm_tmp (bool): remove or not the temporary csv file. Defaults to
-                         True.
+          rm_tmp (bool): remove or not the temporary csv file, if one is
+                         needed. Defaults to True.
+          chunksize (int): if given, the dataframe is split into chunks of
+                           this number of rows, each one loaded by its own
+                           LOAD DATA statement and transaction.
+          parallel (int): number of chunks loaded concurrently, each one over
+                          its own pooled connection. If chunksize is not
+                          given, the dataframe is split into this number of
+                          chunks. Defaults to loading chunks one by one.
+          errors (dict): if given, collects the error of every failed chunk
+                         by chunk number (0-based) instead of raising the
+                         first one. Rows of the other chunks are committed.
+          spool_dir (string): directory for the private temporary directory
+                              of every load. Defaults to the system
+                              temporary directory.
         Returns:
           db_table(Table): sqlalchemy table mapping the table with the inserted
                            records.
 
         """
-        tmpfile = 'tmp.csv'  # filename for temporary file to load from
-        sep = ';'  # separator for temp file
-        quotechar = '"'  # Character used to quote fields
-        line_terminated_by = '\n'  # termination character for file lines
+        if not isinstance(data_table, pd.DataFrame):
+            raise TypeError("data_table must be a DataFrame.")
 
         if columns == ['*']:
-            columns = ', '.join(data_table.columns)
-        else:
-            columns = ', '.join(columns)
+            columns = list(data_table.columns)
 
         if not schema:
             schema = self.database
 
+        # column types are inferred from the whole frame, as to_sql() does,
+        # but only the table structure is created; rows go through LOAD DATA
+        SQLTable(data_table.name, SQLDatabase(self.engine), frame=data_table,
+                 index=False, if_exists=if_exists, schema=schema).create()
+        if parallel and not chunksize:
+            chunksize = max(-(-len(data_table.index) // parallel), 1)
+        if chunksize:
+            row_count = self._load_chunks(data_table, columns, schema,
+                                          chunksize, parallel=parallel,
+                                          rm_tmp=rm_tmp, errors=errors,
+                                          spool_dir=spool_dir)
+            LOGGER.info('Number of inserted rows: %s', str(row_count))
+            return self.get_table(data_table.name, schema)
         connection = self.engine.connect()
-        db_table = Table()
-        if isinstance(data_table, pd.DataFrame):
-            data_table.to_sql(data_table.name, self.engine,
-                                  if_exists=if_exists, index=False)
-        else:
-            raise TypeError("data_table must be a DataFrame.")
         try:
-            LOGGER.info('creating %s ok', tmpfile)
-            data_table.to_csv(tmpfile, na_rep='\\N', header=False,
-                              index=False, sep=sep, quotechar=quotechar)
-            LOGGER.info('loading %s ok', tmpfile)
-            sql_load = f'''LOAD DATA LOCAL INFILE '{tmpfile}' INTO TABLE
-                           {schema}.{data_table.name}
-                           FIELDS TERMINATED BY '{sep}'
-                           OPTIONALLY ENCLOSED BY '{quotechar}'
-                           LINES TERMINATED BY '{line_terminated_by}'
-                           ({columns});'''
-            connection.execute(sql_load)
-            if rm_tmp:
-                os.remove(tmpfile)
-            db_table = self.get_table(data_table.name)
-            row_count = connection.engine.scalar(
-                select([func.count('*')]).select_from(db_table))
+            row_count = self._load_data(connection, data_table,
+                                        data_table.name, columns, schema,
+                                        rm_tmp=rm_tmp, spool_dir=spool_dir)
             LOGGER.info('Number of inserted rows: %s', str(row_count))
+            db_table = self.get_table(data_table.name, schema)
         except Exception as exception:
             LOGGER.error(exception)
             raise
@@ -236,8 +255,134 @@ class MySQL:
             connection.close()
         return db_table
 
+    def _load_chunks(self, data_table, columns, schema, chunksize,
+                     parallel=None, rm_tmp=True, errors=None,
+                     spool_dir=None):
+        """
+        Bulk load a dataframe in chunks, concurrently if requested.
+
+        Args:
+          data_table(Dataframe): dataframe with the data to load. Must
+                                 contain the target table name in its name
+                                 attribute.
+          columns(list): column names of the destination table.
+          schema(string): name of the database that contains the table.
+          chunksize(int): number of rows of every chunk.
+          parallel(int): number of chunks loaded concurrently.
+          rm_tmp(bool): remove or not the temporary csv files, if needed.
+          errors(dict): if given, collects the error of every failed chunk.
+          spool_dir(string): directory for the temporary directories.
+        Returns:
+          row_count(int): number of loaded rows.
+
+        """
+        offsets = range(0, len(data_table.index), chunksize)
+        failures = {}
+        row_count = 0
+        with ThreadPoolExecutor(max_workers=parallel or 1) as executor:
+            loads = {
+                executor.submit(self._load_chunk,
+                                data_table.iloc[offset:offset + chunksize],
+                                data_table.name, columns, schema,
+                                rm_tmp, spool_dir): number
+                for number, offset in enumerate(offsets)}
+            for load in as_completed(loads):
+                try:
+                    row_count += load.result()
+                except Exception as error:
+                    failures[loads[load]] = error
+        for number, error in sorted(failures.items()):
+            last_row = min(offsets[number] + chunksize, offsets.stop) - 1
+            LOGGER.error('Unable to load chunk %s of %s (rows %s to %s): %s',
+                         number, data_table.name, offsets[number], last_row,
+                         error)
+        if failures and errors is None:
+            raise failures[min(failures)]
+        if errors is not None:
+            errors.update(failures)
+        return row_count
+
+    def _load_chunk(self, chunk, table_name, columns, schema, rm_tmp=True,
+                    spool_dir=None):
+        """Bulk load a chunk over its own pooled connection."""
+        connection = self.engine.connect()
+        try:
+            return self._load_data(connection, chunk, table_name, columns,
+                                   schema, rm_tmp=rm_tmp,
+                                   spool_dir=spool_dir)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _load_data(connection, data_table, table_name, columns, schema,
+                   rm_tmp=True, spool_dir=None):
+        """
+        Bulk load a dataframe into an existing table with LOAD DATA.
+
+        The dataframe is serialized by a writer thread into a named pipe
+        read by the server, so serialization and ingest overlap and no data
+        is written to disk. Without named pipes (Windows), a temporary file
+        is written first.
+
+        Args:
+          connection(Connection): sqlalchemy connection to load with.
+          data_table(Dataframe): dataframe with the data to load.
+          table_name(string): name of the destination table.
+          columns(list): column names of the destination table, in the
+                         order of the dataframe columns.
+          schema(string): name of the database that contains the table.
+          rm_tmp(bool): remove or not the temporary csv file, if one is
+                        needed. Defaults to True.
+          spool_dir(string): directory where the private temporary
+                             directory of the load is created. Defaults to
+                             the system temporary directory.
+        Returns:
+          row_count(int): number of loaded rows.
+
+        """
+        # a private directory per load, so concurrent loads never collide
+        tmp_dir = tempfile.mkdtemp(prefix='etlstat_', dir=spool_dir)
+        path = os.path.join(tmp_dir, f'{table_name}.csv')
+        errors = []
+        opened = threading.Event()
+        writer = None
+        if hasattr(os, 'mkfifo'):
+            os.mkfifo(path)
+            writer = threading.Thread(target=_write_csv,
+                                      args=(data_table, path, errors, opened),
+                                      daemon=True)
+            writer.start()
+        else:
+            _write_csv(data_table, path, errors)
+        infile = path.replace(os.sep, '/')
+        columns = ', '.join(columns)
+        sql_load = f'''LOAD DATA LOCAL INFILE '{infile}' INTO TABLE
+                       {schema}.{table_name}
+                       CHARACTER SET {CHARACTER_SET}
+                       FIELDS TERMINATED BY '{FIELD_SEP}'
+                       OPTIONALLY ENCLOSED BY '{QUOTE_CHAR}'
+                       LINES TERMINATED BY '{LINE_TERMINATOR}'
+                       ({columns});'''
+        trans = connection.begin()
+        try:
+            if errors:
+                raise errors[0]
+            result = connection.execute(sql_load)
+            _close_pipe(path, writer, opened)
+            if errors:
+                raise errors[0]
+            trans.commit()
+        except Exception:
+            trans.rollback()
+            raise
+        finally:
+            _close_pipe(path, writer, opened)
+            if rm_tmp or writer is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        return result.rowcount
+
     def upsert(self, tmp_data, table_name, sql, if_exists='fail',
-               columns=['*'], rm_tmp=True, schema=None):
+               columns=['*'], rm_tmp=True, schema=None, spool_dir=None):
         r"""
         Update/insert a dataframe into a table.
 
@@ -264,6 +409,8 @@ class MySQL:
                              csv temporary file created by 'insert' method.
             schema (string): name of the database that contains the
                              destination table.
+            spool_dir (string): directory for the temporary files of the
+                                'insert' method.
         Returns:
             db_table(Table): sqlalchemy table mapping the table with the
                                 inserted/updated records.
@@ -275,7 +422,7 @@ class MySQL:
         connection = self.engine.connect()
         try:
             self.insert(tmp_data, if_exists=if_exists, columns=columns,
-                        rm_tmp=rm_tmp, schema=schema)
+                        rm_tmp=rm_tmp, schema=schema, spool_dir=spool_dir)
             connection.execute(sql)  # update/insert query
             if rm_tmp:
                 self.drop(tmp_data.name)  # remove temporary table
@@ -291,3 +438,93 @@ class MySQL:
         finally:
             connection.close()
         return db_table
+
+    def load_many(self, loads, workers=4, errors=None):
+        """
+        Run several inserts/upserts concurrently.
+
+        Every load uses its own connection and temporary files, so loads to
+        different tables can run at the same time.
+
+        Args:
+            loads(list): keyword arguments of every load. Loads with a 'sql'
+                         key are run by 'upsert', the others by 'insert'.
+            workers(int): number of loads run at the same time. Defaults to
+                          4. Loads beyond the size of the engine connection
+                          pool wait for a free connection.
+            errors(dict): if given, collects the error of every failed load
+                          by its position in loads instead of raising the
+                          first one.
+        Returns:
+            tables(list): sqlalchemy tables mapping the loaded tables, in
+                          the order of loads; None for failed loads.
+
+        """
+        loads = list(loads)
+        names = [load['table_name'] if 'sql' in load
+                 else load['data_table'].name for load in loads]
+        tables = [None] * len(loads)
+        failures = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.upsert if 'sql' in load else self.insert,
+                                **load): number
+                for number, load in enumerate(loads)}
+            for future in as_completed(futures):
+                try:
+                    tables[futures[future]] = future.result()
+                except Exception as error:
+                    failures[futures[future]] = error
+        for number, error in sorted(failures.items()):
+            LOGGER.error('Unable to load %s into table %s: %s', number,
+                         names[number], error)
+        if failures and errors is None:
+            raise failures[min(failures)]
+        if errors is not None:
+            errors.update(failures)
+        return tables
+
+
+def _write_csv(data_table, path, errors, opened=None):
+    """
+    Serialize a dataframe in the CSV dialect expected by LOAD DATA.
+
+    Args:
+      data_table(Dataframe): dataframe to serialize.
+      path(string): destination file or named pipe.
+      errors(list): list where the raised exception, if any, is appended.
+      opened(Event): optional event set once the destination is open.
+
+    """
+    try:
+        with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+            if opened:
+                opened.set()
+            data_table.to_csv(csv_file, na_rep=NULL_VALUE, header=False,
+                              index=False, sep=FIELD_SEP,
+                              quotechar=QUOTE_CHAR)
+    except Exception as exception:  # reported by the loading thread
+        errors.append(exception)
+
+
+def _close_pipe(path, writer, opened):
+    """
+    Wait for a pipe writer, unblocking it if the server stopped reading.
+
+    Args:
+      path(string): named pipe the writer is serializing into.
+      writer(Thread): writer thread, or None when no pipe is used.
+      opened(Event): event set by the writer once the pipe is open.
+
+    """
+    if writer is None or not writer.is_alive():
+        return
+    # a read end lets a blocked writer open the pipe; closing it makes the
+    # pending writes fail with a broken pipe
+    read_fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        while writer.is_alive() and not opened.wait(0.1):
+            pass
+    finally:
+        os.close(read_fd)
+    writer.join()
@@ -14,17 +14,34 @@ This module manages PostgreSQL primitives.
 
 """
 
+import io
 import logging
+import struct
+import numpy as np
 import sqlparse
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, MetaData, Table
+from sqlalchemy.sql import sqltypes
 from sqlalchemy.exc import DatabaseError, InterfaceError, DataError,\
     OperationalError,IntegrityError,InternalError,ProgrammingError,\
     NotSupportedError
 import pandas as pd
+from pandas.io.sql import SQLDatabase, SQLTable
 
 logging.basicConfig(level=logging.INFO)
 LOGGER = logging.getLogger(__name__)
 
+COPY_FORMATS = ('csv', 'binary')
+STAGING_TABLES = ('temp', 'unlogged')
+# CSV dialect of COPY, the same used by MySQL.insert for LOAD DATA
+FIELD_SEP = ';'
+QUOTE_CHAR = '"'
+NULL_VALUE = '\\N'
+# binary COPY framing, see the COPY "Binary Format" section of the manual
+BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+BINARY_TRAILER = struct.pack('>h', -1)
+NULL_FIELD = struct.pack('>i', -1)
+PG_EPOCH = np.datetime64('2000-01-01T00:00:00', 'us')
+
 
 class PostgreSQL:
     """
@@ -123,3 +140,383 @@ class PostgreSQL:
         finally:
             connection.close()
         return results
+
+    def get_table(self, table_name, schema=None):
+        """
+        Get a database table into a sqlalchemy Table object.
+
+        Args:
+            table_name(string): name of the database table to map.
+            schema(string): name of the schema to which the table belongs.
+                        Defaults to the search path of the connection.
+        Returns:
+            table(Table): sqlalchemy Table object referencing the specified
+                            database table.
+
+        """
+        meta = MetaData(bind=self.engine, schema=schema)
+        return Table(table_name, meta, autoload=True,
+                     autoload_with=self.engine)
+
+    def drop(self, table_name, schema=None):
+        """
+        Drop a table from the database.
+
+        Args:
+          table_name(str): name of the table to drop.
+          schema (string): optional schema name.
+
+        Returns: nothing.
+
+        """
+        db_table = self.get_table(table_name, schema)
+        db_table.drop(self.engine, checkfirst=True)
+        LOGGER.info('Table %s successfully dropped.', db_table.fullname)
+
+    def insert(self, data_table, if_exists='fail', columns=['*'],
+               schema=None, chunksize=100000, copy_format='csv'):
+        """
+        Insert a dataframe into a table.
+
+        Creates the table structure if needed and bulk loads the dataframe
+        with COPY FROM STDIN, serializing it chunk by chunk into an
+        in-memory buffer. The whole load runs in a single transaction.
+
+        Args:
+          data_table(Dataframe): dataframe with the data to load.
+                                 Must contain the target table name in
+                                 its name attribute.
+          if_exists(string): {‘fail’, ‘replace’, ‘append’}, default ‘fail’.
+                             See `pandas.to_sql()` for details. Warning: if
+                             replace is chosen, PKs will be deleted and will
+                             have to be recreated.
+          columns(list): list of str containing the column names to load to a
+                         table. Defaults to ['*'] (all columns).
+          schema (string): name of the schema that contains the destination
+                           table. Defaults to the search path of the
+                           connection.
+          chunksize (int): number of rows serialized and sent by every COPY
+                           statement. Defaults to 100000.
+          copy_format (string): {‘csv’, ‘binary’}, default ‘csv’. Binary
+                                fields are encoded after the column types
+                                of the table, which must be integer, float,
+                                boolean, date, time, timestamp or text
+                                types.
+        Returns:
+          db_table(Table): sqlalchemy table mapping the table with the inserted
+                           records.
+
+        """
+        if not isinstance(data_table, pd.DataFrame):
+            raise TypeError("data_table must be a DataFrame.")
+        if copy_format not in COPY_FORMATS:
+            raise ValueError(f'copy_format must be one of {COPY_FORMATS}.')
+
+        if columns == ['*']:
+            columns = list(data_table.columns)
+
+        connection = self.engine.connect()
+        trans = connection.begin()
+        try:
+            # column types are inferred from the whole frame, as to_sql()
+            # does, but only the table structure is created; rows go
+            # through COPY
+            SQLTable(data_table.name, SQLDatabase(connection),
+                     frame=data_table, index=False, if_exists=if_exists,
+                     schema=schema).create()
+            row_count = self._copy(connection, data_table, data_table.name,
+                                   columns, schema, chunksize, copy_format)
+            trans.commit()
+            LOGGER.info('Number of inserted rows: %s', str(row_count))
+        except Exception as exception:
+            trans.rollback()
+            LOGGER.error(exception)
+            raise
+        finally:
+            connection.close()
+        return self.get_table(data_table.name, schema)
+
+    def _copy(self, connection, data_table, table_name, columns, schema,
+              chunksize=100000, copy_format='csv'):
+        """
+        Stream a dataframe into an existing table with COPY FROM STDIN.
+
+        Args:
+          connection(Connection): sqlalchemy connection to load with. The
+                                  caller owns the transaction.
+          data_table(Dataframe): dataframe with the data to load.
+          table_name(string): name of the destination table.
+          columns(list): column names of the destination table, in the
+                         order of the dataframe columns.
+          schema(string): name of the schema that contains the table.
+          chunksize(int): number of rows sent by every COPY statement.
+          copy_format(string): {‘csv’, ‘binary’}.
+        Returns:
+          row_count(int): number of loaded rows.
+
+        """
+        preparer = self.engine.dialect.identifier_preparer
+        target = preparer.quote(table_name)
+        if schema:
+            target = f'{preparer.quote_schema(schema)}.{target}'
+        if copy_format == 'binary':
+            # binary fields are encoded after the actual column types
+            db_table = Table(table_name, MetaData(schema=schema),
+                             autoload=True, autoload_with=connection)
+            column_types = [db_table.c[column].type for column in columns]
+        columns = ', '.join(preparer.quote(column) for column in columns)
+        if copy_format == 'binary':
+            options = 'FORMAT binary'
+        else:
+            options = f"FORMAT csv, DELIMITER '{FIELD_SEP}', " \
+                f"QUOTE '{QUOTE_CHAR}', NULL '{NULL_VALUE}'"
+        sql_copy = f'COPY {target} ({columns}) FROM STDIN WITH ({options})'
+        cursor = connection.connection.cursor()
+        row_count = 0
+        try:
+            for start in range(0, len(data_table.index), chunksize):
+                chunk = data_table.iloc[start:start + chunksize]
+                if copy_format == 'binary':
+                    buffer = io.BytesIO(_copy_binary(chunk, column_types))
+                else:
+                    buffer = io.StringIO()
+                    chunk.to_csv(buffer, na_rep=NULL_VALUE, header=False,
+                                 index=False, sep=FIELD_SEP,
+                                 quotechar=QUOTE_CHAR)
+                    buffer.seek(0)
+                cursor.copy_expert(sql_copy, buffer)
+                row_count += cursor.rowcount
+        finally:
+            cursor.close()
+        return row_count
+
+    def upsert(self, tmp_data, table_name, sql=None, keys=None,
+               columns=['*'], rm_tmp=True, schema=None, staging='temp',
+               chunksize=100000, copy_format='csv'):
+        """
+        Update/insert a dataframe into a table.
+
+        Copies the dataframe into a staging table shaped like the
+        destination one and merges it with a single set-based statement:
+        either a generated INSERT ... ON CONFLICT (keys) DO UPDATE or the
+        given SQL. Everything runs in one transaction.
+
+        Args:
+            tmp_data(Dataframe): dataframe with the data to load. Its name
+                                 attribute is the name of the staging table,
+                                 to be referenced by a custom sql.
+            table_name(String): name of the table to be
+                                updated/inserted to.
+            sql(string): optional string with the SQL update/insert query.
+            keys(list): columns of the unique constraint or primary key of
+                        the destination table. Required if sql is not given.
+                        Rows are expected to be unique by these columns.
+            columns(list): list of str containing the column names to load to a
+                         table. Defaults to ['*'] (all columns).
+            rm_tmp(Boolean): Defauls to True. Determines if an unlogged
+                             staging table should be dropped (expected
+                             behaviour) or not (for debugging purposes).
+                             Temporary staging tables are always dropped at
+                             the end of the transaction.
+            schema (string): name of the schema that contains the
+                             destination table and the unlogged staging one.
+            staging (string): {‘temp’, ‘unlogged’}, default ‘temp’. Kind of
+                              staging table; neither writes its data to the
+                              WAL.
+            chunksize (int): number of rows sent by every COPY statement.
+            copy_format (string): {‘csv’, ‘binary’}, default ‘csv’. See
+                                  `insert()`.
+        Returns:
+            db_table(Table): sqlalchemy table mapping the table with the
+                                inserted/updated records.
+
+        """
+        if sql is None and not keys:
+            raise ValueError('keys are required to generate the upsert.')
+        if staging not in STAGING_TABLES:
+            raise ValueError(f'staging must be one of {STAGING_TABLES}.')
+        if copy_format not in COPY_FORMATS:
+            raise ValueError(f'copy_format must be one of {COPY_FORMATS}.')
+
+        if columns == ['*']:
+            columns = list(tmp_data.columns)
+
+        preparer = self.engine.dialect.identifier_preparer
+        target = preparer.quote(table_name)
+        if schema:
+            target = f'{preparer.quote_schema(schema)}.{target}'
+        stage_schema = schema if staging == 'unlogged' else None
+        stage = preparer.quote(tmp_data.name)
+        if stage_schema:
+            stage = f'{preparer.quote_schema(stage_schema)}.{stage}'
+        if staging == 'temp':
+            ddl = f'CREATE TEMPORARY TABLE {stage} ' \
+                f'(LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP'
+        else:
+            ddl = f'CREATE UNLOGGED TABLE {stage} ' \
+                f'(LIKE {target} INCLUDING DEFAULTS)'
+        if sql is None:
+            sql = _upsert_sql(preparer, target, stage, columns, keys)
+
+        connection = self.engine.connect()
+        trans = connection.begin()
+        try:
+            connection.execute(ddl)
+            self._copy(connection, tmp_data, tmp_data.name, columns,
+                       stage_schema, chunksize, copy_format)
+            result = connection.execute(sql)  # update/insert query
+            if staging == 'unlogged' and rm_tmp:
+                connection.execute(f'DROP TABLE {stage}')
+            trans.commit()
+            LOGGER.info('Number of inserted/updated rows: %s',
+                        str(result.rowcount))
+        except Exception as exception:
+            trans.rollback()
+            LOGGER.exception(exception)
+            raise
+        finally:
+            connection.close()
+        return self.get_table(table_name, schema)
+
+
+def _upsert_sql(preparer, target, stage, columns, keys):
+    """
+    Generate an INSERT ... ON CONFLICT statement from a staging table.
+
+    Args:
+      preparer(IdentifierPreparer): sqlalchemy identifier quoting helper.
+      target(string): quoted name of the destination table.
+      stage(string): quoted name of the staging table.
+      columns(list): names of the loaded columns.
+      keys(list): names of the conflict columns.
+    Returns:
+      string: SQL statement.
+
+    """
+    names = ', '.join(preparer.quote(column) for column in columns)
+    conflict = ', '.join(preparer.quote(key) for key in keys)
+    updates = [f'{preparer.quote(column)} = EXCLUDED.{preparer.quote(column)}'
+               for column in columns if column not in keys]
+    if updates:
+        action = 'DO UPDATE SET ' + ', '.join(updates)
+    else:
+        action = 'DO NOTHING'
+    return f'INSERT INTO {target} ({names}) SELECT {names} FROM {stage} ' \
+        f'ON CONFLICT ({conflict}) {action}'
+
+
+def _copy_binary(data_table, column_types):
+    """
+    Serialize a dataframe in the PostgreSQL binary COPY format.
+
+    Args:
+      data_table(Dataframe): dataframe to serialize.
+      column_types(list): sqlalchemy types of the destination columns, in
+                          the order of the dataframe columns.
+    Returns:
+      bytes: COPY data, header and trailer included.
+
+    """
+    fields = [_binary_values(data_table.iloc[:, number], column_type)
+              for number, column_type in enumerate(column_types)]
+    if all(values.dtype != object and not nulls.any()
+           for values, nulls in fields):
+        # fixed-width rows without nulls: a single structured array
+        layout = [('count', '>i2')]
+        for number, (values, _) in enumerate(fields):
+            layout += [(f'length{number}', '>i4'),
+                       (f'value{number}', values.dtype)]
+        rows = np.empty(len(data_table.index), layout)
+        rows['count'] = len(fields)
+        for number, (values, _) in enumerate(fields):
+            rows[f'length{number}'] = values.dtype.itemsize
+            rows[f'value{number}'] = values
+        body = rows.tobytes()
+    else:
+        count = struct.pack('>h', len(fields))
+        columns = [_binary_fields(values, nulls) for values, nulls in fields]
+        body = b''.join(count + b''.join(row) for row in zip(*columns))
+    return BINARY_HEADER + body + BINARY_TRAILER
+
+
+def _binary_values(series, column_type):
+    """
+    Convert a column to the values of its binary COPY representation.
+
+    Integer, float, boolean, date, timestamp and time columns become
+    big-endian numpy arrays; text columns become UTF-8 encoded values.
+
+    Args:
+      series(Series): dataframe column.
+      column_type(TypeEngine): sqlalchemy type of the destination column.
+    Returns:
+      tuple: array of values and boolean array of nulls.
+
+    """
+    nulls = series.isna().to_numpy()
+    if isinstance(column_type, (sqltypes.Integer, sqltypes.Float,
+                                sqltypes.Boolean)):
+        if isinstance(column_type, sqltypes.SmallInteger):
+            target = '>i2'
+        elif isinstance(column_type, sqltypes.BigInteger):
+            target = '>i8'
+        elif isinstance(column_type, sqltypes.Integer):
+            target = '>i4'
+        elif isinstance(column_type, sqltypes.REAL):
+            target = '>f4'
+        elif isinstance(column_type, sqltypes.Float):
+            target = '>f8'
+        else:
+            target = '?'
+        values = series.to_numpy(dtype=np.dtype(target).newbyteorder('='),
+                                 na_value=0)
+        return values.astype(target), nulls
+    if isinstance(column_type, (sqltypes.Date, sqltypes.DateTime)):
+        if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+            series = pd.to_datetime(series)
+        if series.dt.tz is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        if isinstance(column_type, sqltypes.DateTime):
+            values = np.where(nulls, PG_EPOCH,
+                              series.to_numpy('datetime64[us]')) - PG_EPOCH
+            return values.astype('>i8'), nulls
+        values = np.where(nulls, PG_EPOCH,
+                          series.to_numpy('datetime64[D]')) - PG_EPOCH
+        return values.astype('timedelta64[D]').astype('>i4'), nulls
+    if isinstance(column_type, sqltypes.Time):
+        values = np.array([0 if null else
+                           ((value.hour * 60 + value.minute) * 60 +
+                            value.second) * 1000000 + value.microsecond
+                           for value, null in zip(series, nulls)], '>i8')
+        return values, nulls
+    if isinstance(column_type, sqltypes.String):
+        values = np.array([b'' if null else str(value).encode('utf-8')
+                           for value, null in zip(series, nulls)],
+                          dtype=object)
+        return values, nulls
+    raise ValueError(f'Column {series.name} of type {column_type} is not '
+                     f"supported by binary COPY, use copy_format='csv'.")
+
+
+def _binary_fields(values, nulls):
+    """
+    Encode the values of a column as binary COPY fields.
+
+    Args:
+      values(ndarray): values returned by _binary_values().
+      nulls(ndarray): boolean array of nulls.
+    Returns:
+      list: length-prefixed field of every row.
+
+    """
+    if values.dtype == object:
+        return [NULL_FIELD if null else struct.pack('>i', len(value)) + value
+                for value, null in zip(values, nulls)]
+    width = values.dtype.itemsize
+    cells = np.empty(len(values), [('length', '>i4'), ('value', values.dtype)])
+    cells['length'] = width
+    cells['value'] = values
+    raw = cells.tobytes()
+    step = width + 4
+    return [NULL_FIELD if null else raw[start:start + step]
+            for start, null in zip(range(0, len(raw), step), nulls)]
@@ -2,7 +2,9 @@
 
 """Integration tests for MySQL database module."""
 
+import datetime
 import os
+import tempfile
 import unittest
 import pandas as pd
 
@@ -11,8 +13,8 @@ from etlstat.text import utils
 
 from pyaxis import pyaxis
 
-from sqlalchemy import (Boolean, Column, DateTime, Float, Integer, String,
-                        func, select)
+from sqlalchemy import (Boolean, Column, Date, DateTime, Float, Integer,
+                        String, Text, func, select)
 from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -203,6 +205,86 @@ class TestMySQL(unittest.TestCase):
         self.assertEqual(actual, expected)
         my_conn.drop('pmh')
 
+    def test_insert_new_table(self):
+        """Check that insert creates the table and loads every row once."""
+        data_columns = ['id', 'column_string', 'column_float']
+        data_values = [[1, 'string;1', 456.956], [2, None, None],
+                       [3, 'string "3"', 38.905], [4, 'año €', 1.0]]
+        data = pd.DataFrame(data_values, columns=data_columns)
+        data.name = 'test_insert_new'
+        my_conn = MySQL(*self.conn_params)
+        table = my_conn.insert(data)
+        current = my_conn.engine.scalar(
+            select([func.count('*')]).select_from(table)
+        )
+        self.assertEqual(current, len(data.index))
+        result_data = pd.read_sql_query(
+            'select * from test_insert_new order by id', con=my_conn.engine)
+        self.assertEqual(result_data['column_string'].tolist(),
+                         ['string;1', None, 'string "3"', 'año €'])
+        self.assertTrue(result_data['column_float'].isnull()[1])
+        my_conn.drop(data.name)
+
+    def test_insert_column_types(self):
+        """Check that insert infers column types from the whole frame."""
+        data = pd.DataFrame({'id': [1, 2],
+                             'day': [datetime.date(2019, 1, 1), None],
+                             'flag': [True, None]})
+        data.name = 'test_insert_types'
+        my_conn = MySQL(*self.conn_params)
+        table = my_conn.insert(data)
+        self.assertIsInstance(table.c.day.type, Date)
+        self.assertNotIsInstance(table.c.flag.type, Text)
+        my_conn.drop(data.name)
+
+    def test_insert_parallel(self):
+        """Check that chunks loaded concurrently insert every row."""
+        my_conn = MySQL(*self.conn_params)
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        data = pd.read_csv(f'''{current_dir}/pmh.csv''')
+        data.name = 'pmh_parallel'
+        errors = {}
+        table = my_conn.insert(data, chunksize=len(data.index) // 5 + 1,
+                               parallel=3, errors=errors)
+        self.assertEqual(errors, {})
+        current = my_conn.engine.scalar(
+            select([func.count('*')]).select_from(table)
+        )
+        self.assertEqual(current, len(data.index))
+        my_conn.drop(data.name)
+
+    def test_load_many(self):
+        """Check that several loads run concurrently, also into one table."""
+        my_conn = MySQL(*self.conn_params)
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        spool_dir = tempfile.mkdtemp()
+        data = pd.read_csv(f'''{current_dir}/pmh.csv''')
+        loads = []
+        for number in range(4):
+            table_data = data.copy()
+            table_data.name = f'pmh_{number}'
+            loads.append({'data_table': table_data, 'spool_dir': spool_dir})
+        # two halves of the same table
+        data.name = 'pmh_halves'
+        data.head(0).to_sql(data.name, my_conn.engine, index=False)
+        for half in (data.iloc[::2], data.iloc[1::2]):
+            half.name = data.name
+            loads.append({'data_table': half, 'if_exists': 'append',
+                          'spool_dir': spool_dir})
+        errors = {}
+        tables = my_conn.load_many(loads, workers=3, errors=errors)
+        self.assertEqual(errors, {})
+        self.assertEqual([table.name for table in tables],
+                         [load['data_table'].name for load in loads])
+        for table in {table.name: table for table in tables}.values():
+            current = my_conn.engine.scalar(
+                select([func.count('*')]).select_from(table)
+            )
+            self.assertEqual(current, len(data.index))
+            my_conn.drop(table.name)
+        self.assertEqual(os.listdir(spool_dir), [])
+        os.rmdir(spool_dir)
+
     def test_upsert(self):
         """Check that upsert method inserts or updates rows in a table."""
         my_conn = MySQL(*self.conn_params)
@@ -1,9 +1,16 @@
 """Integration tests for PostgreSQL database module."""
 
+import datetime
+import os
 import unittest
 
+import pandas as pd
+
 from etlstat.database.postgresql import PostgreSQL
 
+from sqlalchemy import Boolean, Date, func, select
+from sqlalchemy.exc import InvalidRequestError
+
 
 class TestPostgreSQL(unittest.TestCase):
     """Testing methods for Postgresql class."""
@@ -82,6 +89,106 @@ class TestPostgreSQL(unittest.TestCase):
         self.assertEqual(len(result[3].index), 2)
         pg_conn.execute('DROP TABLE table1')
 
+    def test_get_table(self):
+        """Check get table from the database using SqlAlchemy."""
+        pg_conn = PostgreSQL(*self.conn_params)
+        inf_schema = pg_conn.get_table('inf_schema', schema='test')
+        row_count = pg_conn.engine.scalar(
+            select([func.count('*')]).select_from(inf_schema)
+        )
+        self.assertGreaterEqual(row_count, 100)
+
+    def test_drop(self):
+        """Check drop for an existing table."""
+        pg_conn = PostgreSQL(*self.conn_params)
+        pg_conn.execute('CREATE TABLE table1 (id integer)')
+        pg_conn.get_table('table1')
+        pg_conn.drop('table1')
+        with self.assertRaises(InvalidRequestError):
+            pg_conn.get_table('table1')
+
+    def test_insert(self):
+        """Check that insert copies rows into a table."""
+        pg_conn = PostgreSQL(*self.conn_params)
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        data = pd.read_csv(f'''{current_dir}/pmh.csv''')
+        for copy_format in ('csv', 'binary'):
+            data.name = f'pmh_{copy_format}'
+            table = pg_conn.insert(data, schema='test', chunksize=1000,
+                                   copy_format=copy_format)
+            current = pg_conn.engine.scalar(
+                select([func.count('*')]).select_from(table)
+            )
+            self.assertEqual(current, len(data.index))
+            pg_conn.drop(data.name, schema='test')
+
+    def test_insert_nulls(self):
+        """Check that insert keeps nulls, empty strings and timestamps."""
+        pg_conn = PostgreSQL(*self.conn_params)
+        data = pd.DataFrame({
+            'id': [1, 2, 3],
+            'Text': ['a;"b"', None, ''],
+            'value': [1.5, None, -2.0],
+            'flag': [True, False, True],
+            'day': pd.to_datetime(['2019-01-01', None, '2019-12-31'])})
+        for copy_format in ('csv', 'binary'):
+            data.name = f'nulls_{copy_format}'
+            pg_conn.insert(data, copy_format=copy_format)
+            result = pg_conn.execute(
+                f'SELECT * FROM nulls_{copy_format} ORDER BY id')[0]
+            self.assertEqual(result['Text'].tolist(), ['a;"b"', None, ''])
+            self.assertTrue(pd.isna(result['value'][1]))
+            self.assertTrue(pd.isna(result['day'][1]))
+            self.assertEqual(result['day'][2], pd.Timestamp('2019-12-31'))
+            pg_conn.drop(data.name)
+
+    def test_insert_column_types(self):
+        """Check that insert infers column types from the whole frame."""
+        pg_conn = PostgreSQL(*self.conn_params)
+        data = pd.DataFrame({'id': [1, 2],
+                             'day': [datetime.date(2019, 1, 1), None],
+                             'flag': [True, None]})
+        for copy_format in ('csv', 'binary'):
+            data.name = f'types_{copy_format}'
+            table = pg_conn.insert(data, copy_format=copy_format)
+            self.assertIsInstance(table.c.day.type, Date)
+            self.assertIsInstance(table.c.flag.type, Boolean)
+            result = pg_conn.execute(
+                f'SELECT * FROM types_{copy_format} ORDER BY id')[0]
+            self.assertEqual(result['day'].tolist()[0],
+                             datetime.date(2019, 1, 1))
+            self.assertEqual(result['flag'].tolist()[0], True)
+            pg_conn.drop(data.name)
+
+    def test_upsert(self):
+        """Check that upsert inserts or updates rows in a table."""
+        pg_conn = PostgreSQL(*self.conn_params)
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        data = pd.read_csv(f'''{current_dir}/pmh.csv''')
+        data.name = 'pmh'
+        tmp_data = pd.read_csv(f'''{current_dir}/pmh_update.csv''')
+        tmp_data.name = 'tmp_pmh'
+        custom_sql = '''UPDATE pmh SET personas = tmp_pmh.personas
+                         FROM test.tmp_pmh
+                         WHERE pmh.id = tmp_pmh.id'''
+        for staging, sql in (('temp', None), ('unlogged', custom_sql)):
+            pg_conn.insert(data, if_exists='replace')
+            pg_conn.execute('ALTER TABLE pmh ADD PRIMARY KEY (id)')
+            pg_conn.upsert(tmp_data, data.name, sql=sql, keys=['id'],
+                           schema='test', staging=staging)
+            updated_table = pg_conn.execute(
+                'SELECT * FROM pmh ORDER BY id')[0]
+            current = updated_table.loc[
+                updated_table['id'] == 5192]['personas'].tolist()[0]
+            self.assertEqual(current, 9976)
+            self.assertEqual(30001 in updated_table['id'].tolist(),
+                             sql is None)
+            with self.assertRaises(InvalidRequestError):
+                pg_conn.get_table('tmp_pmh', schema='test')
+        pg_conn.drop(data.name)
+        with self.assertRaises(ValueError):
+            pg_conn.upsert(tmp_data, data.name)
+
 
 if __name__ == '__main__':
     unittest.main()
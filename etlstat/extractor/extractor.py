@@ -12,8 +12,22 @@ dataframe.
 """
 
 import fnmatch
+import json
+import logging
 import os
-from contextlib import ExitStack
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import (Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor, as_completed)
+from contextlib import ExitStack, closing
+from functools import partial
+from hashlib import sha256
+from html.parser import HTMLParser
+from itertools import islice
 
 import Levenshtein
 
@@ -23,13 +37,516 @@ import defusedxml.ElementTree as ET
 
 import numpy as np
 
+import openpyxl
+
 import pandas as pd
 
 from pyaxis import pyaxis
 
+import requests
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+
+logging.basicConfig(level=logging.INFO)
+LOGGER = logging.getLogger(__name__)
+
+POOL_EXECUTORS = {
+    'process': ProcessPoolExecutor,
+    'thread': ThreadPoolExecutor
+}
+
+TXT_ENGINES = ('pandas', 'numpy')
+
+PX_ENGINES = ('pyaxis', 'numpy')
+
+PX_DTYPE_POLICIES = ('legacy', 'compact')
+
+HTML_ENGINES = ('bs4', 'fast')
+
+# readers used by extract(), by format name. See register_reader().
+READERS = {}
+
+# categories of the FLAG column of compact px data
+PX_FLAGS = ('null', 'sd')
+
+# types read for every DATA_TYPE of a positional layout
+DTYPE_POLICIES = {
+    'legacy': {
+        'STRING': str,
+        'NUMBER': np.float32,
+        'DECIMAL': np.float32,
+        'INTEGER': np.float32
+    },
+    'compact': {
+        'STRING': str,
+        'NUMBER': np.float64,
+        'DECIMAL': np.float64,
+        'INTEGER': str
+    }
+}
+
+# narrowest integer type holding any number of up to n digits
+INTEGER_TYPES = ((2, np.int8), (4, np.int16), (9, np.int32), (18, np.int64))
+
+# maximum ratio of distinct values to rows of a categorical STRING field
+CATEGORY_RATIO = 0.5
+
+# strings recognized as NA/NaN by default by pandas readers
+DEFAULT_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'n/a', 'nan',
+    'null'
+}
+
+
+def _parallel_map(func, *iterables, workers=None, pool='process'):
+    """Apply a function to every item of the iterables, concurrently if asked.
+
+    Args:
+        func (callable): function to apply. Must be picklable (module level)
+                         when a process pool is used.
+        *iterables: iterables whose items are passed as arguments to func.
+        workers (int): maximum number of concurrent workers. None or 1 runs
+                       serially in the calling process.
+        pool (str): {'process', 'thread'}, default 'process'. Kind of pool
+                    used when workers > 1. Use 'thread' for I/O-bound
+                    readers.
+
+    Returns:
+        list: results of func in the same order as the input items.
+
+    """
+    if pool not in POOL_EXECUTORS:
+        raise ValueError(f"pool must be one of {list(POOL_EXECUTORS)}")
+    if not workers or workers <= 1:
+        return list(map(func, *iterables))
+    with POOL_EXECUTORS[pool](max_workers=workers) as executor:
+        return list(executor.map(func, *iterables))
+
+
+class LazyData(Mapping):
+    """Read-only mapping whose values are parsed on first access.
+
+    Keys are known beforehand (usually from a directory scan) and values are
+    built by calling a loader with the key. Parsed values are kept in a
+    bounded LRU cache, so peak memory follows the working set instead of
+    the whole directory.
+
+    """
+
+    def __init__(self, keys, loader, maxsize=16):
+        """
+        Initialize the mapping.
+
+        Args:
+            keys (iterable): keys of the mapping, in iteration order.
+            loader (callable): function receiving a key and returning its
+                               value.
+            maxsize (int): maximum number of parsed values kept in memory.
+                           None keeps every value once parsed.
+
+        """
+        self._keys = list(dict.fromkeys(keys))
+        self._loader = loader
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        """Return the value for key, parsing it if it is not cached."""
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        if key not in self._keys:
+            raise KeyError(key)
+        value = self._loader(key)
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while self.maxsize is not None and \
+                    len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return value
+
+    def __iter__(self):
+        """Iterate over the keys without parsing any value."""
+        return iter(self._keys)
+
+    def __len__(self):
+        """Return the number of keys."""
+        return len(self._keys)
+
+    def __contains__(self, key):
+        """Check membership without parsing any value."""
+        return key in self._keys
+
+    def cached(self):
+        """Return the keys whose values are currently held in memory."""
+        with self._lock:
+            return list(self._cache)
+
+
+def _scan_dir(dir_path, pattern):
+    """Find the files in a directory whose names match a pattern.
+
+    The directory is scanned once with os.scandir() and absolute paths are
+    returned, so the working directory is never changed and readers can run
+    concurrently in threads.
+
+    Args:
+        dir_path (str): directory to scan.
+        pattern (str): shell-style pattern filenames must match.
+
+    Returns:
+        dict: file names as KEYS and absolute paths as VALUES, sorted by
+              name.
+
+    """
+    with os.scandir(dir_path) as entries:
+        return dict(sorted(
+            (entry.name, os.path.abspath(entry.path)) for entry in entries
+            if entry.is_file() and fnmatch.fnmatch(entry.name, pattern)))
+
+
+def _set_name(data, name):
+    """Set the name attribute of a dataframe and return it.
+
+    The attribute is set on the object itself, so a 'name' column is not
+    overwritten.
+    """
+    object.__setattr__(data, 'name', name)
+    return data
+
+
+def _set_sheet_names(sheets):
+    """Name every dataframe of a dict of sheets after its sheet name."""
+    for sheet in sheets:
+        _set_name(sheets[sheet], sheet)
+    return sheets
+
+
+def _cached(loader, cache_dir, **key_args):
+    """Wrap a file loader with the on-disk columnar cache.
+
+    Args:
+        loader (callable): function receiving one or more file paths and
+                           returning a dataframe or a dict of dataframes.
+        cache_dir (str): cache directory. If None, loader is returned as is.
+        **key_args: reader name and arguments that, together with the path,
+                    size and modification time of the files, identify a
+                    cache entry.
+
+    Returns:
+        callable: function with the same positional arguments as loader.
+
+    """
+    if not cache_dir:
+        return loader
+    if pa is None:
+        raise ImportError("pyarrow is required to use cache_dir")
+    return partial(_load_cached, loader, cache_dir, key_args)
+
+
+def _load_cached(loader, cache_dir, key_args, *paths):
+    """Read files from the cache or parse and store them.
+
+    Entries are keyed by the absolute path, size and modification time of
+    every file in paths plus the reader arguments, so a changed source or a
+    different set of arguments misses the cache. Data are stored as
+    uncompressed Feather files and memory-mapped when read back.
+
+    Args:
+        loader (callable): function parsing the files on a cache miss.
+        cache_dir (str): cache directory.
+        key_args (dict): reader name and arguments.
+        *paths (str): files parsed by loader.
+
+    Returns:
+        DataFrame or dict of DataFrames, as returned by loader.
+
+    """
+    sources = []
+    for path in paths:
+        stat = os.stat(path)
+        sources.append((os.path.abspath(path), stat.st_size,
+                        stat.st_mtime_ns))
+    path_key = sha256(repr([source[0] for source in sources]).encode()
+                      ).hexdigest()[:16]
+    state_key = sha256(repr((sources, _cache_key_value(key_args))).encode()
+                       ).hexdigest()[:16]
+    entry = os.path.join(cache_dir, f'{path_key}-{state_key}')
+    if os.path.isdir(entry):
+        try:
+            return _read_cache_entry(entry)
+        except (pa.ArrowException, OSError, ValueError) as error:
+            # unreadable entry: parse the files again and rebuild it
+            LOGGER.warning('Rebuilding cache entry %s: %s', entry, error)
+            shutil.rmtree(entry, ignore_errors=True)
+    data = loader(*paths)
+    os.makedirs(cache_dir, exist_ok=True)
+    if _write_cache_entry(entry, data):
+        _drop_stale_entries(cache_dir, path_key, entry)
+    return data
+
+
+def _cache_key_value(value):
+    """Normalize an argument so its repr is stable between processes.
+
+    Sets repr in hash-randomized order, so they are sorted, as are the
+    keys of dicts. Sequences keep their order.
+
+    Args:
+        value: argument of a reader.
+
+    Returns:
+        A value with a deterministic repr.
+
+    """
+    if isinstance(value, dict):
+        return sorted(((repr(key), _cache_key_value(item))
+                       for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(_cache_key_value(item)) for item in value)
+    if isinstance(value, (list, tuple)):
+        return [_cache_key_value(item) for item in value]
+    return value
+
+
+def _drop_stale_entries(cache_dir, key, entry):
+    """Remove the entries of older versions of a cached source.
+
+    Args:
+        cache_dir (str): cache directory.
+        key (str): key of the source, prefix of all its entry names.
+        entry (str): current entry, which is kept.
+
+    """
+    for name in os.listdir(cache_dir):
+        if name.startswith(key + '-') and name != os.path.basename(entry):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def _read_cache_entry(entry):
+    """Read a dataframe or a dict of dataframes from a cache entry.
+
+    Args:
+        entry (str): cache entry directory.
+
+    Returns:
+        DataFrame or dict of DataFrames.
+
+    """
+    with open(os.path.join(entry, 'index.json'), 'r') as index_file:
+        index = json.load(index_file)
+    frames = [feather.read_table(os.path.join(entry, f'{position}.feather'),
+                                 memory_map=True).to_pandas()
+              for position in range(len(index['names']))]
+    if index['type'] == 'frame':
+        return frames[0]
+    return dict(zip(index['names'], frames))
+
+
+def _write_cache_entry(entry, data, meta=None, files=None):
+    """Store a dataframe or a dict of dataframes in a cache entry.
+
+    The entry is written to a temporary directory and renamed, so readers
+    never see partial entries. Data that Feather cannot round-trip (e.g.
+    non-string column names or mixed-type columns) is not cached.
+
+    Args:
+        entry (str): cache entry directory.
+        data (DataFrame, dict): data to store.
+        meta (dict): JSON serializable information stored in the entry index.
+        files (dict): names and contents (bytes) of additional files stored
+                      in the entry.
+
+    Returns:
+        bool: True if the entry was written.
+
+    """
+    is_frame = isinstance(data, pd.DataFrame)
+    frames = [data] if is_frame else list(data.values())
+    index = {'type': 'frame' if is_frame else 'dict',
+             'names': [None] if is_frame else list(data),
+             'meta': meta}
+    tmp_entry = tempfile.mkdtemp(prefix='.tmp-',
+                                 dir=os.path.dirname(entry))
+    try:
+        for name, contents in (files or {}).items():
+            with open(os.path.join(tmp_entry, name), 'wb') as file:
+                file.write(contents)
+        for position, frame in enumerate(frames):
+            if not all(isinstance(column, str) for column in frame.columns):
+                raise ValueError("column names must be strings")
+            feather.write_feather(pa.Table.from_pandas(frame),
+                                  os.path.join(tmp_entry,
+                                               f'{position}.feather'),
+                                  compression='uncompressed')
+        with open(os.path.join(tmp_entry, 'index.json'), 'w') as index_file:
+            json.dump(index, index_file)
+        os.rename(tmp_entry, entry)
+    except (pa.ArrowException, ValueError, TypeError, OSError) as error:
+        LOGGER.warning('Not caching %s: %s', entry, error)
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        return False
+    return True
+
+
+def _iter_chunks(reader, path, name, chunksize):
+    """Yield the chunks of a file, opening it on the first iteration.
+
+    Args:
+        reader (callable): pandas reader accepting a path and a chunksize.
+        path (str): path to the file.
+        name (str): name given to every chunk.
+        chunksize (int): number of rows per chunk.
+
+    Yields:
+        DataFrame: chunks of the file.
+
+    """
+    with reader(path, chunksize=chunksize) as chunks:
+        for chunk in chunks:
+            yield _set_name(chunk, name)
+
+
+def _iter_data(data, prefetch=False):
+    """Yield the items of a lazy mapping one at a time in sorted key order.
+
+    Args:
+        data (Mapping): mapping parsing its values on access (LazyData).
+        prefetch (bool): parse the next value in a background thread while
+                         the caller processes the current one.
+
+    Yields:
+        tuple: (key, value) pairs.
+
+    """
+    names = sorted(data)
+    if not prefetch:
+        for name in names:
+            yield name, data[name]
+        return
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(data.__getitem__, names[0]) if names \
+            else None
+        for index, name in enumerate(names):
+            value = future.result()
+            if index + 1 < len(names):
+                future = executor.submit(data.__getitem__, names[index + 1])
+            yield name, value
+
+
+class FormatIndex:
+    """
+    Index of positional format files for matching them with data files.
+
+    A data file is matched with the format file whose name has the highest
+    Levenshtein ratio to its own. Format files with the same stem as the
+    data file (name without extension) are taken first. Otherwise the
+    candidates are visited in decreasing order of an upper bound of the
+    ratio computed for all of them at once from the characters both names
+    share, and the edit distance is only computed until the bound falls
+    below the best ratio found. Ties go to the first format file in name
+    order. The index can be reused across calls; matches are memoized.
+
+    """
+
+    def __init__(self, format_path, format_extension='*.[cC][sS][vV]'):
+        """
+        Scan a directory and index its format files.
+
+        Args:
+            format_path (str): directory containing format files.
+            format_extension (str): standard for format filenames
+                                    extensions.
+
+        """
+        self.format_path = format_path
+        self.formats = list(_scan_dir(format_path, format_extension))
+        if not self.formats:
+            raise FileNotFoundError(
+                "No format files found in format directory")
+        self._stems = {}
+        for element in self.formats:
+            self._stems.setdefault(os.path.splitext(element)[0], element)
+        self._alphabet = np.unique(np.frombuffer(
+            ''.join(self.formats).encode('utf-32-le'), dtype='<u4'))
+        self._counts = self._char_counts(self.formats)
+        self._lengths = np.array([len(element) for element in self.formats])
+        self._matches = {}
+
+    def _char_counts(self, names):
+        """Count the characters of every name found in the index alphabet."""
+        counts = np.zeros((len(names), len(self._alphabet)), dtype=np.int32)
+        chars = np.frombuffer(''.join(names).encode('utf-32-le'), dtype='<u4')
+        rows = np.repeat(np.arange(len(names)),
+                         [len(name) for name in names])
+        columns = np.minimum(np.searchsorted(self._alphabet, chars),
+                             len(self._alphabet) - 1)
+        known = self._alphabet[columns] == chars
+        np.add.at(counts, (rows[known], columns[known]), 1)
+        return counts
+
+    def match(self, data_list, block_size=256):
+        """
+        Match data filenames with format filenames.
+
+        Args:
+            data_list (iterable): data filenames.
+            block_size (int): number of data filenames whose bounds are
+                              computed at once.
+
+        Returns:
+            dict: Data filenames as KEYS and format filenames as VALUES.
+
+        """
+        data_list = list(dict.fromkeys(data_list))
+        pending = []
+        for item in data_list:
+            if item not in self._matches:
+                stem = os.path.splitext(item)[0]
+                if stem in self._stems:
+                    self._matches[item] = self._stems[stem]
+                else:
+                    pending.append(item)
+        for start in range(0, len(pending), block_size):
+            block = pending[start:start + block_size]
+            common = np.minimum(self._char_counts(block)[:, None, :],
+                                self._counts[None, :, :]).sum(axis=2)
+            lengths = np.array([len(item) for item in block])
+            # Levenshtein.ratio is 2 * LCS / (len1 + len2) and the longest
+            # common subsequence cannot exceed the shared characters
+            bounds = 2 * common / (lengths[:, None] + self._lengths[None, :])
+            for item, item_bounds in zip(block, bounds):
+                self._matches[item] = self._best_match(item, item_bounds)
+        return {item: self._matches[item] for item in data_list}
+
+    def _best_match(self, item, bounds):
+        """Find the format with the highest ratio using the upper bounds."""
+        max_similarity = 0
+        max_position = None
+        for position in np.argsort(-bounds, kind='stable'):
+            if bounds[position] < max_similarity - 1e-9:
+                break
+            similarity = Levenshtein.ratio(item, self.formats[position])
+            if similarity > max_similarity or (
+                    similarity == max_similarity and
+                    max_position is not None and position < max_position):
+                max_similarity = similarity
+                max_position = position
+        if max_position is None:
+            return None
+        return self.formats[max_position]
+
 
 def match_data_format(data_path, data_extension,
-                      format_path, format_extension):
+                      format_path, format_extension, format_index=None):
     """Match format files(csv) with data files (txt) for positional files.
 
     Args:
@@ -37,53 +554,29 @@ def match_data_format(data_path, data_extension,
         data_extension (str): standard for data filenames extensions.
         format_path (str): directory containing format files.
         format_extension (str): standard for format filenames extensions.
+        format_index (FormatIndex): index of the format files to reuse
+                                    across calls. Defaults to a new index of
+                                    format_path.
 
     Returns:
         dict: Data filenames (TXT) as KEYS and format filenames (CSV) as
               VALUES.
 
     """
-    assignation_map = {}
     # Contains data filenames
-    data_list = []
-    os.chdir(data_path)
-    for file in os.listdir('.'):
-        # Finds every data file in a directory
-        if fnmatch.fnmatch(file, data_extension):
-            data_list.append(file)
+    data_list = list(_scan_dir(data_path, data_extension))
     if not data_list:
         raise FileNotFoundError("No data files found in data directory")
-    data_list = set(data_list)
-    data_list = list(data_list)
-
-    # Contains format filenames
-    format_list = []
-    os.chdir(format_path)
-    for file in os.listdir('.'):
-        # Finds every format file in a directory
-        if fnmatch.fnmatch(file, format_extension):
-            format_list.append(file)
-    if not format_list:
-        raise FileNotFoundError("No format files found in format directory")
-    format_list = set(format_list)
-    format_list = list(format_list)
-
-    for item in data_list:
-        max_similarity = 0
-        max_element = None
-        for element in format_list:
-            similarity = Levenshtein.ratio(item, element)
-            if similarity > max_similarity:
-                max_similarity = similarity
-                max_element = element
-        assignation_map[item] = max_element
-        # logger.info("Matched data file: " + item + " with: " +
-        #             assignation_map[item])
-    return assignation_map
+
+    if format_index is None:
+        format_index = FormatIndex(format_path, format_extension)
+    return format_index.match(data_list)
 
 
 def xls(dir_path, sep=';', encoding='utf-8',
-        data_extension='*.[xX][lL][sS]', na_values=None):
+        data_extension='*.[xX][lL][sS]', na_values=None, workers=None,
+        pool='process', lazy=False, lru_size=16, cache_dir=None, sheets=None,
+        usecols=None, nrows=None):
     """Massively read XLS files from a directory.
 
     Read excel files in a directory and generate a dict with xls names and
@@ -96,28 +589,112 @@ def xls(dir_path, sep=';', encoding='utf-8',
         data_extension (str): standard for data filenames extensions.
         na_values (scalar, str, list-like, or dict) : Additional strings to
                                                       recognize as NA/NaN.
+        workers (int): number of files parsed concurrently. Defaults to None
+                       (serial reading).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used when workers > 1.
+        lazy (bool): return a LazyData mapping that reads each workbook on
+                     first access instead of a dict. Defaults to False.
+        lru_size (int): maximum number of workbooks kept in memory in lazy
+                        mode.
+        cache_dir (str): directory of an on-disk columnar cache of parsed
+                         workbooks (requires pyarrow). Defaults to None (no
+                         cache).
+        sheets (str, int or list): sheet names, zero-based indexes or
+                                   shell-style patterns of the sheets to
+                                   read. Defaults to None (every sheet).
+        usecols (str, list or callable): columns to read from every sheet.
+                                         See pandas.read_excel().
+        nrows (int): number of rows to read from every sheet.
 
     Returns:
         dict: Excel name and sheet_names as KEYS and dataframe as VALUE.
 
     """
-    os.chdir(dir_path)
-    data = {}
-    for excel in os.listdir('.'):
-        if fnmatch.fnmatch(excel, data_extension):
-            data[excel] = dict()
-            data[excel] = pd.read_excel(open(dir_path + excel, 'rb'),
-                                        sheet_name=None,
-                                        na_values=na_values
-                                        )
-            for sheet in data[excel]:
-                data[excel][sheet].name = sheet
+    excel_files = _scan_dir(dir_path, data_extension)
+    read_xls = _cached(partial(_xls_file, na_values=na_values, sheets=sheets,
+                               usecols=usecols, nrows=nrows),
+                       cache_dir, reader='xls', na_values=na_values,
+                       sheets=sheets, usecols=usecols, nrows=nrows)
+    if lazy:
+        return LazyData(
+            excel_files,
+            lambda excel: _set_sheet_names(read_xls(excel_files[excel])),
+            maxsize=lru_size)
+    workbooks = _parallel_map(read_xls, excel_files.values(),
+                              workers=workers, pool=pool)
+    data = dict(zip(excel_files, workbooks))
+    for excel in data:
+        _set_sheet_names(data[excel])
     return data
 
 
+def _xls_file(path, na_values=None, sheets=None, usecols=None, nrows=None):
+    """Read the selected sheets of an Excel file.
+
+    Sheets are selected from the workbook sheet names before parsing, so
+    unselected sheets are never turned into dataframes; usecols and nrows
+    are passed on to the Excel engine through pandas.read_excel().
+
+    Args:
+        path (str): path to the file.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+        sheets (str, int or list): sheet names, zero-based indexes or
+                                   shell-style patterns of the sheets to
+                                   read. Defaults to None (every sheet).
+        usecols (str, list or callable): columns to read from every sheet.
+                                         See pandas.read_excel().
+        nrows (int): number of rows to read from every sheet.
+
+    Returns:
+        dict: sheet names as KEYS and dataframes as VALUES.
+
+    """
+    with pd.ExcelFile(path) as workbook:
+        return pd.read_excel(workbook,
+                             sheet_name=_select_sheets(workbook.sheet_names,
+                                                       sheets),
+                             na_values=na_values, usecols=usecols,
+                             nrows=nrows)
+
+
+def _select_sheets(sheet_names, sheets=None):
+    """Select sheet names by name, zero-based index or shell-style pattern.
+
+    Args:
+        sheet_names (list): sheet names of a workbook.
+        sheets (str, int or list): selectors. None selects every sheet.
+
+    Returns:
+        list: selected sheet names in selection order, without duplicates.
+
+    """
+    if sheets is None:
+        return list(sheet_names)
+    if isinstance(sheets, (str, int)):
+        sheets = [sheets]
+    selected = []
+    for sheet in sheets:
+        if isinstance(sheet, int):
+            if not -len(sheet_names) <= sheet < len(sheet_names):
+                raise ValueError(f"Worksheet index {sheet} is invalid, "
+                                 f"{len(sheet_names)} worksheets found")
+            selected.append(sheet_names[sheet])
+        elif sheet in sheet_names:
+            selected.append(sheet)
+        elif any(char in sheet for char in '*?['):
+            selected.extend(fnmatch.filter(sheet_names, sheet))
+        else:
+            raise ValueError(f"Worksheet named '{sheet}' not found")
+    return list(dict.fromkeys(selected))
+
+
 def xlsx(dir_path, sep=';', encoding='utf-8',
          data_extension='*.[xX][lL][sS][xX]',
-         na_values=None):
+         na_values=None, workers=None, pool='process', lazy=False,
+         lru_size=16, cache_dir=None, sheets=None, usecols=None, nrows=None,
+         chunksize=None):
     """Massively read XLSX files from a directory.
 
     Read excel files in a directory and generate a dict with xls names and
@@ -130,13 +707,266 @@ def xlsx(dir_path, sep=';', encoding='utf-8',
         data_extension (str): standard for data filenames extensions.
         na_values (scalar, str, list-like, or dict) : Additional strings to
                                                       recognize as NA/NaN.
+        workers (int): number of files parsed concurrently. Defaults to None
+                       (serial reading).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used when workers > 1.
+        lazy (bool): return a LazyData mapping that reads each workbook on
+                     first access instead of a dict. Defaults to False.
+        lru_size (int): maximum number of workbooks kept in memory in lazy
+                        mode.
+        cache_dir (str): directory of an on-disk columnar cache of parsed
+                         workbooks (requires pyarrow). Defaults to None (no
+                         cache).
+        sheets (str, int or list): sheet names, zero-based indexes or
+                                   shell-style patterns of the sheets to
+                                   read. Defaults to None (every sheet).
+        usecols (str, list or callable): columns to read from every sheet.
+                                         See pandas.read_excel().
+        nrows (int): number of rows to read from every sheet.
+        chunksize (int): if given, every sheet is an iterator of dataframes
+                         with chunksize rows each, streamed from the workbook
+                         in read-only mode so that memory use does not grow
+                         with the sheet size. usecols must then be a list of
+                         column names or positions. workers, lazy and
+                         cache_dir are not used in chunksize mode.
 
     Returns:
         dict: Excel name and sheet_names as KEYS and dataframe as VALUE.
 
     """
+    if chunksize:
+        data = {}
+        for excel, path in _scan_dir(dir_path, data_extension).items():
+            workbook = openpyxl.load_workbook(path, read_only=True)
+            try:
+                sheet_names = _select_sheets(workbook.sheetnames, sheets)
+            finally:
+                workbook.close()
+            data[excel] = {
+                sheet: _iter_xlsx_sheet(path, sheet, chunksize,
+                                        na_values=na_values,
+                                        usecols=usecols, nrows=nrows)
+                for sheet in sheet_names}
+        return data
     return xls(dir_path,
-               data_extension=data_extension, na_values=na_values)
+               data_extension=data_extension, na_values=na_values,
+               workers=workers, pool=pool, lazy=lazy, lru_size=lru_size,
+               cache_dir=cache_dir, sheets=sheets, usecols=usecols,
+               nrows=nrows)
+
+
+def _iter_xlsx_sheet(path, sheet, chunksize, na_values=None, usecols=None,
+                     nrows=None):
+    """Yield the rows of an XLSX sheet as dataframes of chunksize rows.
+
+    The workbook is opened in read-only mode on the first iteration and its
+    rows are parsed one at a time, so only one chunk is held in memory. The
+    first row is the header; its trailing empty cells are dropped and rows
+    are padded or truncated to its width. Empty rows at the end of the sheet
+    are skipped.
+
+    Args:
+        path (str): path to the file.
+        sheet (str): sheet name.
+        chunksize (int): number of rows per chunk.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN. A
+                                                      dict sets them per
+                                                      column.
+        usecols (list): column names or positions to read. Defaults to None
+                        (every column).
+        nrows (int): number of rows to read.
+
+    Yields:
+        DataFrame: chunks of the sheet named after it.
+
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        while header and header[-1] is None:
+            header.pop()
+        columns = [f'Unnamed: {i}' if value is None else value
+                   for i, value in enumerate(header)]
+        positions = _xlsx_positions(columns, usecols)
+        columns = [columns[i] for i in positions]
+        column_na = _xlsx_na_values(na_values, columns)
+        width = len(header)
+        chunk, empty, start = [], 0, 0
+        for row in rows:
+            if nrows is not None and start + len(chunk) + empty >= nrows:
+                break
+            if all(value is None for value in row):
+                empty += 1
+                continue
+            chunk.extend([(np.nan,) * len(positions)] * empty)
+            empty = 0
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            chunk.append(tuple(
+                np.nan if row[i] is None or isinstance(row[i], str) and
+                row[i] in na_strings else row[i]
+                for i, na_strings in zip(positions, column_na)))
+            if len(chunk) >= chunksize:
+                yield _xlsx_chunk(chunk[:chunksize], columns, start, sheet)
+                chunk = chunk[chunksize:]
+                start += chunksize
+        while chunk:
+            yield _xlsx_chunk(chunk[:chunksize], columns, start, sheet)
+            chunk = chunk[chunksize:]
+            start += chunksize
+    finally:
+        workbook.close()
+
+
+def _xlsx_na_values(na_values, columns):
+    """Return the NA strings of every column, as pandas.read_excel() does.
+
+    Args:
+        na_values (scalar, str, list-like, or dict): Additional strings to
+                                                     recognize as NA/NaN,
+                                                     per column if a dict.
+        columns (list): column names.
+
+    Returns:
+        list: set of NA strings of every column.
+
+    """
+    def as_set(values):
+        if values is None:
+            return set()
+        if isinstance(values, str) or np.isscalar(values):
+            return {values}
+        return set(values)
+
+    if isinstance(na_values, dict):
+        return [DEFAULT_NA_VALUES.union(as_set(na_values.get(column)))
+                for column in columns]
+    return [DEFAULT_NA_VALUES.union(as_set(na_values))] * len(columns)
+
+
+def _xlsx_positions(columns, usecols=None):
+    """Return the positions of the columns selected by usecols.
+
+    Args:
+        columns (list): column names.
+        usecols (list): column names or positions. None selects every column.
+
+    Returns:
+        list: selected column positions in sheet order.
+
+    """
+    if usecols is None:
+        return list(range(len(columns)))
+    if isinstance(usecols, str) or callable(usecols):
+        raise ValueError("usecols must be a list of column names or "
+                         "positions when streaming XLSX sheets")
+    positions = set()
+    for column in usecols:
+        if isinstance(column, int) and not isinstance(column, bool):
+            if not 0 <= column < len(columns):
+                raise ValueError(f"Column position {column} is out of range")
+            positions.add(column)
+        elif column in columns:
+            positions.add(columns.index(column))
+        else:
+            raise ValueError(f"Column '{column}' not found")
+    return sorted(positions)
+
+
+def _xlsx_chunk(rows, columns, start, name):
+    """Build a named dataframe from a chunk of sheet rows.
+
+    Args:
+        rows (list): tuples of cell values.
+        columns (list): column names.
+        start (int): position of the first row in the sheet data.
+        name (str): name given to the dataframe.
+
+    Returns:
+        DataFrame: chunk with a RangeIndex continuing the previous chunk.
+
+    """
+    chunk = pd.DataFrame.from_records(
+        rows, columns=columns,
+        index=pd.RangeIndex(start, start + len(rows))).infer_objects()
+    return _set_name(chunk, name)
+
+
+def iter_xls(dir_path, data_extension='*.[xX][lL][sS]', na_values=None,
+             prefetch=False, sheets=None, usecols=None, nrows=None):
+    """Read XLS files from a directory one at a time.
+
+    Generator counterpart of xls(): only one workbook is held in memory at
+    a time. Files are yielded in sorted name order.
+
+    Args:
+        dir_path (str): directory containing Excel files.
+        data_extension (str): standard for data filenames extensions.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+        prefetch (bool): parse the next workbook in a background thread while
+                         the current one is processed. Defaults to False.
+        sheets (str, int or list): sheet names, zero-based indexes or
+                                   shell-style patterns of the sheets to
+                                   read. Defaults to None (every sheet).
+        usecols (str, list or callable): columns to read from every sheet.
+                                         See pandas.read_excel().
+        nrows (int): number of rows to read from every sheet.
+
+    Yields:
+        tuple: Excel name and a dict with sheet names as KEYS and dataframes
+               as VALUES.
+
+    """
+    yield from _iter_data(xls(dir_path, data_extension=data_extension,
+                              na_values=na_values, lazy=True, lru_size=0,
+                              sheets=sheets, usecols=usecols, nrows=nrows),
+                          prefetch=prefetch)
+
+
+def iter_xlsx(dir_path, data_extension='*.[xX][lL][sS][xX]', na_values=None,
+              prefetch=False, sheets=None, usecols=None, nrows=None,
+              chunksize=None):
+    """Read XLSX files from a directory one at a time.
+
+    Generator counterpart of xlsx(). Without chunksize only one workbook is
+    held in memory at a time; with chunksize its sheets are streamed in
+    read-only mode and only one chunk is held in memory at a time. Files are
+    yielded in sorted name order.
+
+    Args:
+        dir_path (str): directory containing Excel files.
+        data_extension (str): standard for data filenames extensions.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+        prefetch (bool): parse the next workbook in a background thread while
+                         the current one is processed. Not used in chunksize
+                         mode. Defaults to False.
+        sheets (str, int or list): sheet names, zero-based indexes or
+                                   shell-style patterns of the sheets to
+                                   read. Defaults to None (every sheet).
+        usecols (str, list or callable): columns to read from every sheet.
+                                         See pandas.read_excel().
+        nrows (int): number of rows to read from every sheet.
+        chunksize (int): stream every sheet as an iterator of dataframes with
+                         chunksize rows each. See xlsx().
+
+    Yields:
+        tuple: Excel name and a dict with sheet names as KEYS and dataframes
+               (or iterators of dataframes in chunksize mode) as VALUES.
+
+    """
+    if chunksize:
+        data = xlsx(dir_path, data_extension=data_extension,
+                    na_values=na_values, sheets=sheets, usecols=usecols,
+                    nrows=nrows, chunksize=chunksize)
+        yield from sorted(data.items())
+        return
+    yield from iter_xls(dir_path, data_extension=data_extension,
+                        na_values=na_values, prefetch=prefetch,
+                        sheets=sheets, usecols=usecols, nrows=nrows)
 
 
 def csv(
@@ -145,7 +975,13 @@ def csv(
         dtype=None, encoding='utf-8',
         na_values=None,
         sep=';',
-        skipinitialspace=False
+        skipinitialspace=False,
+        workers=None,
+        pool='process',
+        lazy=False,
+        lru_size=16,
+        chunksize=None,
+        cache_dir=None
 ):
     """Massively read CSV files from a directory.
 
@@ -161,28 +997,86 @@ def csv(
                                                       recognize as NA/NaN.
         sep (str): field separator.
         skipinitialspace (bool): skip spaces after delimiter.
+        workers (int): number of files parsed concurrently. Defaults to None
+                       (serial reading).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used when workers > 1.
+        lazy (bool): return a LazyData mapping that reads each file on first
+                     access instead of a dict. Defaults to False.
+        lru_size (int): maximum number of dataframes kept in memory in lazy
+                        mode.
+        chunksize (int): if given, every value is an iterator of dataframes
+                         with chunksize rows each, read on demand. workers
+                         and lazy are ignored in this mode.
+        cache_dir (str): directory of an on-disk columnar cache of parsed
+                         files (requires pyarrow). Defaults to None (no
+                         cache). Not used in chunksize mode.
 
     Returns:
         dict: Csv name as KEY and dataframe as VALUE
 
     """
-    os.chdir(dir_path)
-    data = {}
-    for file in os.listdir('.'):
-        if fnmatch.fnmatch(file, data_extension):
-            data[file] = pd.read_csv(dir_path + file,
-                                     dtype=dtype,
-                                     encoding=encoding,
-                                     na_values=na_values,
-                                     sep=sep,
-                                     skipinitialspace=skipinitialspace)
-            data[file].name = file
+    files = _scan_dir(dir_path, data_extension)
+    read_csv = partial(pd.read_csv,
+                       dtype=dtype,
+                       encoding=encoding,
+                       na_values=na_values,
+                       sep=sep,
+                       skipinitialspace=skipinitialspace)
+    if chunksize:
+        return {file: _iter_chunks(read_csv, path, file, chunksize)
+                for file, path in files.items()}
+    read_csv = _cached(read_csv, cache_dir, reader='csv', dtype=dtype,
+                       encoding=encoding, na_values=na_values, sep=sep,
+                       skipinitialspace=skipinitialspace)
+    if lazy:
+        return LazyData(
+            files, lambda file: _set_name(read_csv(files[file]), file),
+            maxsize=lru_size)
+    data = dict(zip(files, _parallel_map(read_csv, files.values(),
+                                         workers=workers, pool=pool)))
+    for file in data:
+        _set_name(data[file], file)
     return data
 
 
+def iter_csv(dir_path, data_extension='*.[cC][sS][vV]', dtype=None,
+             encoding='utf-8', na_values=None, sep=';',
+             skipinitialspace=False, prefetch=False):
+    """Read CSV files from a directory one at a time.
+
+    Generator counterpart of csv(): only one dataframe is held in memory at
+    a time. Files are yielded in sorted name order.
+
+    Args:
+        dir_path (str): directory containing Csv files.
+        data_extension (str): standard for data filenames extensions.
+        dtype (str, dict): data type for data or columns.
+        encoding (str): file encoding.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+        sep (str): field separator.
+        skipinitialspace (bool): skip spaces after delimiter.
+        prefetch (bool): parse the next file in a background thread while the
+                         current one is processed. Defaults to False.
+
+    Yields:
+        tuple: Csv name and dataframe.
+
+    """
+    yield from _iter_data(csv(dir_path, data_extension=data_extension,
+                              dtype=dtype, encoding=encoding,
+                              na_values=na_values, sep=sep,
+                              skipinitialspace=skipinitialspace,
+                              lazy=True, lru_size=0),
+                          prefetch=prefetch)
+
+
 def px(filename, sep=",", csv_encoding='windows-1252',
        px_encoding='ISO-8859-2', timeout=10, null_values=r'^"\."$',
-       sd_values=r'"\.\."'):
+       sd_values=r'"\.\."', workers=None, pool='process', cache_dir=None,
+       max_concurrency=None, errors=None, engine='pyaxis', chunksize=None,
+       dtype_policy='legacy'):
     """Massively read PC-Axis files from a list of URLs in a CSV file.
 
     Read and convert PC-Axis files to dataframes from URIs listed in a CSV
@@ -198,20 +1092,76 @@ def px(filename, sep=",", csv_encoding='windows-1252',
                           file. Defaults to '.'.
         sd_values(str): regex with the pattern for the statistical disclosured
                         values in the px file. Defaults to '..'.
+        workers (int): number of px files parsed concurrently. Defaults to
+                       None (serial parsing).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used when workers > 1.
+        cache_dir (str): directory of an on-disk columnar cache of parsed px
+                         files (requires pyarrow). Files downloaded from URLs
+                         are revalidated with conditional requests and only
+                         parsed again when their contents change. Defaults
+                         to None (no cache).
+        max_concurrency (int): maximum number of URLs listed in a CSV file
+                               downloaded at the same time. Defaults to None
+                               (one at a time).
+        errors (dict): if given, the download or parse error of every URL
+                       listed in a CSV file is stored in it by id and the
+                       remaining URLs are still read. Otherwise the first
+                       error is raised once the batch is finished.
+        engine (str): {'pyaxis', 'numpy'}, default 'pyaxis'. Parser of the px
+                      files. The numpy engine splits the metadata with
+                      regular expressions, resolves null and disclosure
+                      markers once per distinct value and builds dimension
+                      columns by indexing, giving the same results.
+        chunksize (int): if given, every value is an iterator of dataframes
+                         with chunksize rows each, parsed on demand from the
+                         DATA section of the file with bounded memory. Only
+                         for px files in a directory; workers, cache_dir and
+                         engine are not used in chunksize mode.
+        dtype_policy (str): {'legacy', 'compact'}, default 'legacy'. 'legacy'
+                            returns dimensions and DATA as strings, with ''
+                            for null and NaN for disclosed values, as
+                            pyaxis does. 'compact' returns dimensions as
+                            category, DATA as float64 and a FLAG category
+                            column marking 'null' and 'sd' (statistical
+                            disclosure) values, which are NaN in DATA. It
+                            always uses the numpy engine.
     Returns:
         dict: file names as keys and dataframes as values.
 
     """
+    if engine not in PX_ENGINES:
+        raise ValueError(f"engine must be one of {list(PX_ENGINES)}")
+    if dtype_policy not in PX_DTYPE_POLICIES:
+        raise ValueError(
+            f"dtype_policy must be one of {list(PX_DTYPE_POLICIES)}")
     data = {}
-    if fnmatch.fnmatch(filename, '*.csv'):
+    if chunksize and os.path.isdir(filename):
+        data = {px_file[:-3]: _iter_px_chunks(
+                    path, chunksize, encoding=px_encoding,
+                    null_values=null_values, sd_values=sd_values,
+                    compact=dtype_policy == 'compact')
+                for px_file, path in _scan_dir(filename, '*.px').items()}
+    elif chunksize:
+        raise ValueError("chunksize is only supported for px files in a "
+                         "directory")
+    elif fnmatch.fnmatch(filename, '*.csv'):
         data = _px_from_urls_in_csv(filename, sep=sep,
                                     csv_encoding=csv_encoding,
                                     px_encoding=px_encoding, timeout=timeout,
                                     null_values=null_values,
-                                    sd_values=sd_values)
+                                    sd_values=sd_values,
+                                    max_concurrency=max_concurrency,
+                                    workers=workers, pool=pool,
+                                    errors=errors, cache_dir=cache_dir,
+                                    engine=engine,
+                                    dtype_policy=dtype_policy)
     elif os.path.isdir(filename):
         data = _px_from_path(filename, encoding=px_encoding, timeout=timeout,
-                             null_values=null_values, sd_values=sd_values)
+                             null_values=null_values, sd_values=sd_values,
+                             workers=workers, pool=pool,
+                             cache_dir=cache_dir, engine=engine,
+                             dtype_policy=dtype_policy)
     else:
         raise TypeError
     return data
@@ -219,11 +1169,16 @@ def px(filename, sep=",", csv_encoding='windows-1252',
 
 def _px_from_urls_in_csv(filename, sep=",", csv_encoding='windows-1252',
                          px_encoding='ISO-8859-2', timeout=10,
-                         null_values=r'^"\."$', sd_values=r'"\.\."'):
+                         null_values=r'^"\."$', sd_values=r'"\.\."',
+                         max_concurrency=None, workers=None, pool='process',
+                         errors=None, cache_dir=None, engine='pyaxis',
+                         dtype_policy='legacy'):
     """Massively read PC-Axis files from a list of URLs in a CSV file.
 
     Read and convert PC-Axis files to dataframes from URIs listed in a CSV
-    file.
+    file. Files are downloaded by a pool of max_concurrency threads and every
+    downloaded file is handed to a pool of parsing workers at once, so that
+    parsing overlaps with the remaining downloads.
 
     Args:
         filename (str): CSV FILE with uris file path (including file name).
@@ -235,140 +1190,1252 @@ def _px_from_urls_in_csv(filename, sep=",", csv_encoding='windows-1252',
                           file. Defaults to '.'.
         sd_values(str): regex with the pattern for the statistical disclosured
                         values in the px file. Defaults to '..'.
+        max_concurrency (int): maximum number of concurrent downloads.
+                               Defaults to None (one at a time).
+        workers (int): number of files parsed concurrently. Defaults to None
+                       (parsing in the calling process).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used to parse when workers > 1.
+        errors (dict): if given, collects the error of every failed URL by
+                       id instead of raising the first one.
+        cache_dir (str): directory of an on-disk cache of downloaded files
+                         and their parsed data (requires pyarrow). Defaults
+                         to None (no cache).
+        engine (str): {'pyaxis', 'numpy'}, default 'pyaxis'. Parser of the px
+                      files.
+        dtype_policy (str): {'legacy', 'compact'}, default 'legacy'. See
+                            px().
     Returns:
-        dict: file names as keys and dataframes as values.
+        dict: file names as keys and dataframes as values, in CSV order.
 
     """
+    if pool not in POOL_EXECUTORS:
+        raise ValueError(f"pool must be one of {list(POOL_EXECUTORS)}")
+    if cache_dir and pa is None:
+        raise ImportError("pyarrow is required to use cache_dir")
     uris = pd.read_csv(filename,
                        sep=sep,
                        encoding=csv_encoding)
-    data = {}
-    uris['data'] = uris.apply(lambda row: pyaxis.parse(
-        row['url'], px_encoding, timeout=timeout, null_values=null_values,
-        sd_values=sd_values)['DATA'], axis=1)
-    data = pd.Series(uris['data'].values, index=uris['id']).to_dict()
-    return data
-
-
-def _px_from_path(dir_path, encoding='ISO-8859-2', timeout=10,
-                  null_values=r'^"\."$', sd_values=r'"\.\."'):
-    """Massively read PC-Axis files from a directory.
-
-    Read files in a directory, convert to dataframe and store in a dict.
+    urls = dict(zip(uris['id'], uris['url']))
+    fetch = partial(_px_download, encoding=px_encoding, timeout=timeout,
+                    cache_dir=cache_dir,
+                    key_args={'reader': 'px', 'encoding': px_encoding,
+                              'null_values': null_values,
+                              'sd_values': sd_values,
+                              'dtype_policy': dtype_policy})
+    parse = partial(_px_text, null_values=null_values, sd_values=sd_values,
+                    engine=engine, dtype_policy=dtype_policy)
+    failures = {}
+    parsed = {}
+    stores = {}
+    with ExitStack() as stack:
+        fetcher = stack.enter_context(
+            ThreadPoolExecutor(max_workers=max_concurrency or 1))
+        parser = None
+        if workers and workers > 1:
+            parser = stack.enter_context(
+                POOL_EXECUTORS[pool](max_workers=workers))
+        downloads = {fetcher.submit(fetch, url): px_id
+                     for px_id, url in urls.items()}
+        for download in as_completed(downloads):
+            px_id = downloads[download]
+            try:
+                text, parsed[px_id], stores[px_id] = download.result()
+                if text is not None:
+                    parsed[px_id] = _submit(parser, parse, text)
+            except Exception as error:
+                failures[px_id] = error
+        for px_id, parsing in parsed.items():
+            try:
+                if isinstance(parsing, Future):
+                    parsed[px_id] = parsing.result()
+                if stores.get(px_id):
+                    stores[px_id](parsed[px_id])
+            except Exception as error:
+                failures[px_id] = error
+    for px_id, error in failures.items():
+        LOGGER.error('Unable to read px %s from %s: %s', px_id, urls[px_id],
+                     error)
+    if failures and errors is None:
+        raise failures[next(px_id for px_id in urls if px_id in failures)]
+    if errors is not None:
+        errors.update(failures)
+    return {px_id: parsed[px_id] for px_id in urls if px_id not in failures}
+
+
+def _px_download(uri, encoding='ISO-8859-2', timeout=10, cache_dir=None,
+                 key_args=None):
+    """Read a px file or URL, revalidating its cached copy if there is one.
+
+    URLs with a cache entry are requested with If-None-Match and
+    If-Modified-Since headers. A 304 response, or a body identical to the
+    cached one, reuses the cached dataframe without parsing the file. The
+    response body is kept in the entry as well, so that a 304 response can
+    still be served if the cached dataframe cannot be read.
 
     Args:
-        dir_path (str): directory containing data files.
-        encoding (str): file encoding for both the px file.
+        uri (str): path or URL of the px file.
+        encoding (str): file encoding for the px file.
         timeout (int): request timeout in seconds; optional
-        null_values(str): regex with the pattern for the null values in the px
-                          file. Defaults to '.'.
-        sd_values(str): regex with the pattern for the statistical disclosured
-                        values in the px file. Defaults to '..'.
+        cache_dir (str): cache directory. Defaults to None (no cache).
+        key_args (dict): reader name and parsing arguments identifying a
+                         cache entry together with the URL.
 
     Returns:
-        dict: Name of px file as KEY and dataframe as VALUE.
+        tuple: contents of the file (None if the cached dataframe is valid),
+               cached dataframe (or None) and a function storing the parsed
+               dataframe in the cache (or None).
 
     """
-    files = {}
-    os.chdir(dir_path)
-    with ExitStack() as context_manager:
-        for filename in os.listdir('.'):
-            if fnmatch.fnmatch(filename, '*.px'):
-                px_df = pyaxis.parse(filename, encoding,
-                                     timeout=timeout, null_values=null_values,
-                                     sd_values=sd_values)['DATA']
-                files[filename.split(dir_path, 1)[-1][:-3]] = px_df
-        context_manager.pop_all().close()
-    return files
-
+    if not cache_dir or pyaxis.uri_type(uri) != 'URL':
+        return pyaxis.read(uri, encoding, timeout=timeout), None, None
+    uri_key = sha256(repr((uri, sorted(key_args.items()))).encode()
+                     ).hexdigest()[:16]
+    entry, meta, headers = None, {}, {}
+    if os.path.isdir(cache_dir):
+        entry = next((os.path.join(cache_dir, name)
+                      for name in os.listdir(cache_dir)
+                      if name.startswith(uri_key + '-')), None)
+    if entry:
+        with open(os.path.join(entry, 'index.json'), 'r') as index_file:
+            meta = json.load(index_file)['meta']
+        if meta['etag']:
+            headers['If-None-Match'] = meta['etag']
+        if meta['last_modified']:
+            headers['If-Modified-Since'] = meta['last_modified']
+    response = requests.get(uri, headers=headers, timeout=timeout)
+    if entry and response.status_code == 304:
+        try:
+            return None, _read_cache_entry(entry), None
+        except (pa.ArrowException, OSError, ValueError) as error:
+            # unreadable dataframe: parse the cached body again
+            LOGGER.warning('Reparsing cached body of %s: %s', uri, error)
+            with open(os.path.join(entry, 'body.px'), 'rb') as body_file:
+                body = body_file.read()
+            shutil.rmtree(entry, ignore_errors=True)
+            return (str(body, encoding, errors='replace'), None,
+                    partial(_store_px_download, cache_dir, uri_key, meta,
+                            body))
+    response.raise_for_status()
+    body = response.content
+    new_meta = {'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': sha256(body).hexdigest()}
+    store = partial(_store_px_download, cache_dir, uri_key, new_meta, body)
+    if entry and meta['sha256'] == new_meta['sha256']:
+        try:
+            data = _read_cache_entry(entry)
+            return None, data, store if new_meta != meta else None
+        except (pa.ArrowException, OSError, ValueError) as error:
+            # unreadable dataframe: parse the body and rebuild the entry
+            LOGGER.warning('Reparsing %s: %s', uri, error)
+            shutil.rmtree(entry, ignore_errors=True)
+    return str(body, encoding, errors='replace'), None, store
 
-def txt(dir_path, sep=';', encoding='windows-1252',
-        format_extension='*.[cC][sS][vV]', data_extension='*.[tT][xX][tT]',
-        na_values=None, format_path=None):
-    """Massively read positional text files from a directory.
 
-    Read files in a directory, generate a correspondence between data and
-    format files and return a dict (MICRODATA). It uses match_data_format() in
-    order to generate the dataframe.
+def _store_px_download(cache_dir, uri_key, meta, body, data):
+    """Store a downloaded px file and its dataframe in the cache.
 
     Args:
-        dir_path (str): directory containing data files.
-        sep (str): field separator.
-        encoding (str): file encoding.
-        format_extension (str): standard for format name.
-        data_extension (str): standard for data name.
-        na_values (scalar, str, list-like, or dict) : Additional strings to
-                                                      recognize as NA/NaN.
-        format_path (str): directory containing format files.
-                           Defaults to dir_path.
+        cache_dir (str): cache directory.
+        uri_key (str): key of the URL and parsing arguments.
+        meta (dict): ETag, Last-Modified and SHA-256 of the response body.
+        body (bytes): response body.
+        data (DataFrame): parsed data.
 
+    """
+    state_key = sha256(json.dumps(meta, sort_keys=True).encode()
+                       ).hexdigest()[:16]
+    entry = os.path.join(cache_dir, f'{uri_key}-{state_key}')
+    if os.path.isdir(entry):
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    if _write_cache_entry(entry, data, meta=meta, files={'body.px': body}):
+        _drop_stale_entries(cache_dir, uri_key, entry)
 
-    Returns:
-        dict: Name of data file as KEY and dataframe as VALUE.
+
+def _submit(executor, func, *args):
+    """Submit a call to an executor, or run it at once without one.
+
+    Args:
+        executor (Executor): pool running the call. None runs it in the
+                             calling thread.
+        func (callable): function to call.
+        *args: arguments of the call.
+
+    Returns:
+        Future: future of the call result.
 
     """
-    conversion_map = {
-        'STRING': str,
-        'NUMBER': np.float32,
-        'DECIMAL': np.float32,
-        'INTEGER': np.float32
-    }
+    if executor is not None:
+        return executor.submit(func, *args)
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as error:
+        future.set_exception(error)
+    return future
+
+
+def _px_text(pc_axis, null_values=r'^"\."$', sd_values=r'"\.\."',
+             engine='pyaxis', dtype_policy='legacy'):
+    """Parse the contents of a PC-Axis file into a dataframe.
+
+    Same steps as pyaxis.parse() once the file has been read, so that files
+    can be downloaded and parsed by different workers.
+
+    Args:
+        pc_axis (str): contents of the px file.
+        null_values(str): regex with the pattern for the null values in the px
+                          file. Defaults to '.'.
+        sd_values(str): regex with the pattern for the statistical disclosured
+                        values in the px file. Defaults to '..'.
+        engine (str): {'pyaxis', 'numpy'}, default 'pyaxis'. Parser used.
+        dtype_policy (str): {'legacy', 'compact'}, default 'legacy'. See
+                            px().
+
+    Returns:
+        DataFrame: data of the px file.
+
+    """
+    if engine == 'numpy' or dtype_policy == 'compact':
+        return _parse_px_numpy(pc_axis, null_values=null_values,
+                               sd_values=sd_values,
+                               compact=dtype_policy == 'compact')
+    metadata_elements, raw_data = pyaxis.metadata_extract(pc_axis)
+    metadata = pyaxis.metadata_split_to_dict(metadata_elements)
+    dimension_names, dimension_members = pyaxis.get_dimensions(metadata)
+    return pyaxis.build_dataframe(dimension_names, dimension_members,
+                                  pd.Series(raw_data.split()),
+                                  null_values=null_values,
+                                  sd_values=sd_values)
+
+
+def _parse_px_numpy(pc_axis, null_values=r'^"\."$', sd_values=r'"\.\."',
+                    compact=False):
+    """Parse the contents of a PC-Axis file with vectorized operations.
+
+    Gives the same dataframe as pyaxis: one column per STUB and HEADING
+    dimension, in that order and with the last dimension varying fastest,
+    plus a DATA column of strings. Null values are replaced by '' and
+    statistical disclosure values by NaN.
+
+    Args:
+        pc_axis (str): contents of the px file.
+        null_values(str): regex with the pattern for the null values in the px
+                          file. Defaults to '.'.
+        sd_values(str): regex with the pattern for the statistical disclosured
+                        values in the px file. Defaults to '..'.
+        compact (bool): return categorical dimensions, float64 DATA and a
+                        FLAG column instead. See _px_chunk().
+
+    Returns:
+        DataFrame: data of the px file.
+
+    """
+    metadata, raw_data = _px_sections(pc_axis)
+    names, members = _px_dimensions(metadata)
+    rows = int(np.prod([len(values) for values in members], dtype=np.int64))
+    tokens = raw_data.replace(';', '').split()[:rows]
+    return _px_chunk(names, members, tokens, 0, rows,
+                     re.compile(null_values), re.compile(sd_values),
+                     compact=compact)
+
+
+def _iter_px_chunks(path, chunksize, encoding='ISO-8859-2',
+                    null_values=r'^"\."$', sd_values=r'"\.\."',
+                    block_size=1 << 20, compact=False):
+    """Yield the data of a PC-Axis file as dataframes of chunksize rows.
+
+    The file is opened on the first iteration and its DATA section is read
+    block_size characters at a time, so memory use is bounded by the chunk
+    size whatever the number of cells. The coordinates of every chunk are
+    computed from its row positions in the cartesian product of the
+    dimensions. Chunks concatenate to the dataframe returned by px().
+
+    Args:
+        path (str): path to the px file.
+        chunksize (int): number of rows per chunk.
+        encoding (str): file encoding for the px file.
+        null_values(str): regex with the pattern for the null values in the px
+                          file. Defaults to '.'.
+        sd_values(str): regex with the pattern for the statistical disclosured
+                        values in the px file. Defaults to '..'.
+        block_size (int): number of characters read at a time.
+        compact (bool): yield categorical dimensions, float64 DATA and a FLAG
+                        column instead. See _px_chunk().
+
+    Yields:
+        DataFrame: consecutive rows of the px data.
+
+    """
+    null_re, sd_re = re.compile(null_values), re.compile(sd_values)
+    with open(path, encoding=encoding) as px_file:
+        header = ''
+        while 'DATA=' not in header:
+            block = px_file.read(block_size)
+            if not block:
+                raise ValueError(f"No DATA section found in {path}")
+            header += block.replace('\n', ' ').replace('\r', ' ')
+        header, buffer = header.split('DATA=', 1)
+        names, members = _px_dimensions(_px_metadata(header))
+        rows = int(np.prod([len(values) for values in members],
+                           dtype=np.int64))
+        start, tokens, done = 0, [], False
+        while not done and start < rows:
+            block = px_file.read(block_size)
+            done = not block
+            buffer += block
+            words = buffer.replace(';', '').split()
+            # keep a token that may continue in the next block
+            buffer = words.pop() if not done and words and \
+                not buffer[-1].isspace() else ''
+            tokens.extend(words)
+            while len(tokens) >= chunksize and start < rows:
+                stop = min(start + chunksize, rows)
+                yield _px_chunk(names, members, tokens[:stop - start], start,
+                                stop, null_re, sd_re, compact=compact)
+                del tokens[:stop - start]
+                start = stop
+        while start < rows:
+            stop = min(start + chunksize, rows)
+            yield _px_chunk(names, members, tokens[:stop - start], start,
+                            stop, null_re, sd_re, compact=compact)
+            del tokens[:stop - start]
+            start = stop
+
+
+def _px_dimensions(metadata):
+    """Return the STUB and HEADING dimension names and their values.
+
+    Args:
+        metadata (dict): px metadata, as returned by _px_metadata().
+
+    Returns:
+        tuple: list of dimension names and list of arrays of their values.
+
+    """
+    names = metadata.get('STUB', []) + metadata.get('HEADING', [])
+    members = [np.array(metadata['VALUES(' + name + ')'], dtype=object)
+               for name in names]
+    return names, members
+
+
+def _px_chunk(names, members, tokens, start, stop, null_re, sd_re,
+              compact=False):
+    """Build the long-format rows start to stop of a px cube.
+
+    In compact mode dimension columns are categories built straight from
+    the value positions, DATA is float64 and a FLAG category column holds
+    'null' or 'sd' for the values matching null_re or sd_re (NaN in DATA).
+
+    Args:
+        names (list): dimension names.
+        members (list): arrays of values of every dimension.
+        tokens (list): DATA values of the rows. Missing values are NaN.
+        start (int): position of the first row.
+        stop (int): position after the last row.
+        null_re (Pattern): null values pattern, removed from the values.
+        sd_re (Pattern): statistical disclosure values pattern.
+        compact (bool): build compact columns. Defaults to False.
+
+    Returns:
+        DataFrame: dimension columns and DATA column (and FLAG column in
+                   compact mode), indexed by position.
+
+    """
+    positions = np.arange(start, stop, dtype=np.int64)
+    sizes = [len(values) for values in members]
+    columns = {}
+    for index, values in enumerate(members):
+        # rows sharing a value of this dimension before it changes
+        repeat = int(np.prod(sizes[index + 1:], dtype=np.int64))
+        value_codes = positions // repeat % sizes[index]
+        if not compact:
+            columns[index] = values[value_codes]
+        elif len(set(values)) == len(values):
+            columns[index] = pd.Categorical.from_codes(value_codes, values)
+        else:
+            columns[index] = pd.Categorical(values[value_codes])
+    codes, distinct = pd.factorize(np.array(tokens, dtype=object))
+    if compact:
+        numbers, flags = _px_numbers(distinct, null_re, sd_re)
+        data_values = np.full(len(positions), np.nan)
+        data_values[:len(codes)] = numbers[codes]
+        flag_codes = np.full(len(positions), -1, dtype=np.int8)
+        flag_codes[:len(codes)] = flags[codes]
+        columns[len(names)] = data_values
+        columns[len(names) + 1] = pd.Categorical.from_codes(flag_codes,
+                                                            PX_FLAGS)
+        names = names + ['DATA', 'FLAG']
+    else:
+        resolved = np.array([_px_value(token, null_re, sd_re)
+                             for token in distinct], dtype=object)
+        data_values = np.full(len(positions), np.nan, dtype=object)
+        data_values[:len(codes)] = resolved[codes]
+        columns[len(names)] = data_values
+        names = names + ['DATA']
+    data = pd.DataFrame(columns, index=pd.RangeIndex(start, stop))
+    data.columns = names
+    return data
+
+
+def _px_numbers(tokens, null_re, sd_re):
+    """Convert distinct px data values to numbers and flags.
+
+    Args:
+        tokens (array): distinct values of the DATA section.
+        null_re (Pattern): null values pattern.
+        sd_re (Pattern): statistical disclosure values pattern.
+
+    Returns:
+        tuple: float64 array of values (NaN for flagged values) and int8
+               array of positions in PX_FLAGS (-1 if not flagged).
+
+    """
+    flags = np.full(len(tokens), -1, dtype=np.int8)
+    values = []
+    for position, token in enumerate(tokens):
+        value = null_re.sub('', token)
+        if sd_re.search(value):
+            flags[position] = PX_FLAGS.index('sd')
+            value = ''
+        elif null_re.search(token):
+            flags[position] = PX_FLAGS.index('null')
+        values.append(value)
+    numbers = pd.to_numeric(pd.Series(values, dtype=object),
+                            errors='coerce').to_numpy(np.float64)
+    invalid = np.isnan(numbers) & (flags == -1) & \
+        (np.array(values, dtype=object) != '')
+    if invalid.any():
+        LOGGER.warning('Reading non-numeric px values as NaN: %s',
+                       list(np.asarray(tokens, dtype=object)[invalid][:5]))
+    return numbers, flags
+
+
+def _px_sections(pc_axis):
+    """Split the contents of a PC-Axis file into metadata and data.
+
+    Args:
+        pc_axis (str): contents of the px file.
+
+    Returns:
+        tuple: metadata dict, as returned by _px_metadata(), and the raw
+               DATA section.
+
+    """
+    pc_axis = pc_axis.replace('\n', ' ').replace('\r', ' ')
+    header, raw_data = pc_axis.split('DATA=')
+    return _px_metadata(header), raw_data
+
+
+def _px_metadata(header):
+    """Parse the metadata section of a PC-Axis file.
+
+    Args:
+        header (str): contents of the px file before DATA=, with line breaks
+                      replaced by blanks.
+
+    Returns:
+        dict: keywords as KEYS and lists of unquoted values as VALUES.
+
+    """
+    metadata = {}
+    # keyword=values; pairs, ignoring separators inside quotes
+    for name, values in re.findall(r'((?:[^=;"]|"[^"]*")*)='
+                                   r'((?:[^;"]|"[^"]*")*);', header):
+        name = name.strip().replace('"', '')
+        name = name.replace('( ', '(').replace(' )', ')')
+        metadata[name] = re.findall('"[ ]*(.+?)[ ]*"+?', values)
+    return metadata
+
+
+def _px_value(token, null_re, sd_re):
+    """Resolve the null and statistical disclosure markers of a data value.
+
+    Args:
+        token (str): value of the DATA section.
+        null_re (Pattern): null values pattern, removed from the value.
+        sd_re (Pattern): statistical disclosure values pattern.
+
+    Returns:
+        str: value, or NaN if it matches sd_re.
+
+    """
+    token = null_re.sub('', token)
+    return np.nan if sd_re.search(token) else token
+
+
+def _px_from_path(dir_path, encoding='ISO-8859-2', timeout=10,
+                  null_values=r'^"\."$', sd_values=r'"\.\."',
+                  workers=None, pool='process', cache_dir=None,
+                  engine='pyaxis', dtype_policy='legacy'):
+    """Massively read PC-Axis files from a directory.
 
+    Read files in a directory, convert to dataframe and store in a dict.
+
+    Args:
+        dir_path (str): directory containing data files.
+        encoding (str): file encoding for both the px file.
+        timeout (int): request timeout in seconds; optional
+        null_values(str): regex with the pattern for the null values in the px
+                          file. Defaults to '.'.
+        sd_values(str): regex with the pattern for the statistical disclosured
+                        values in the px file. Defaults to '..'.
+        workers (int): number of files parsed concurrently. Defaults to None
+                       (serial reading).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used when workers > 1.
+        cache_dir (str): directory of an on-disk columnar cache of parsed
+                         files (requires pyarrow). Defaults to None.
+        engine (str): {'pyaxis', 'numpy'}, default 'pyaxis'. Parser of the px
+                      files.
+        dtype_policy (str): {'legacy', 'compact'}, default 'legacy'. See
+                            px().
+
+    Returns:
+        dict: Name of px file as KEY and dataframe as VALUE.
+
+    """
+    px_files = _scan_dir(dir_path, '*.px')
+    parse = _cached(partial(_px_file, encoding=encoding, timeout=timeout,
+                            null_values=null_values, sd_values=sd_values,
+                            engine=engine, dtype_policy=dtype_policy),
+                    cache_dir, reader='px', encoding=encoding,
+                    null_values=null_values, sd_values=sd_values,
+                    dtype_policy=dtype_policy)
+    px_dfs = _parallel_map(parse, px_files.values(), workers=workers,
+                           pool=pool)
+    return {px_file[:-3]: px_df for px_file, px_df in zip(px_files, px_dfs)}
+
+
+def _px_file(uri, encoding='ISO-8859-2', timeout=10,
+             null_values=r'^"\."$', sd_values=r'"\.\."', engine='pyaxis',
+             dtype_policy='legacy'):
+    """Read a PC-Axis file or URL and return its data as a dataframe.
+
+    Args:
+        uri (str): path or URL of the px file.
+        encoding (str): file encoding for the px file.
+        timeout (int): request timeout in seconds; optional
+        null_values(str): regex with the pattern for the null values in the px
+                          file. Defaults to '.'.
+        sd_values(str): regex with the pattern for the statistical disclosured
+                        values in the px file. Defaults to '..'.
+        engine (str): {'pyaxis', 'numpy'}, default 'pyaxis'. Parser used.
+        dtype_policy (str): {'legacy', 'compact'}, default 'legacy'. See
+                            px().
+
+    Returns:
+        DataFrame: data of the px file.
+
+    """
+    return _px_text(pyaxis.read(uri, encoding, timeout=timeout),
+                    null_values=null_values, sd_values=sd_values,
+                    engine=engine, dtype_policy=dtype_policy)
+
+
+def txt(dir_path, sep=';', encoding='windows-1252',
+        format_extension='*.[cC][sS][vV]', data_extension='*.[tT][xX][tT]',
+        na_values=None, format_path=None, workers=None, pool='process',
+        lazy=False, lru_size=16, chunksize=None, cache_dir=None,
+        engine='pandas', dtype_policy='legacy', format_index=None):
+    """Massively read positional text files from a directory.
+
+    Read files in a directory, generate a correspondence between data and
+    format files and return a dict (MICRODATA). It uses match_data_format() in
+    order to generate the dataframe.
+
+    Args:
+        dir_path (str): directory containing data files.
+        sep (str): field separator.
+        encoding (str): file encoding.
+        format_extension (str): standard for format name.
+        data_extension (str): standard for data name.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+        format_path (str): directory containing format files.
+                           Defaults to dir_path.
+        workers (int): number of files parsed concurrently. Defaults to None
+                       (serial reading).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used when workers > 1.
+        lazy (bool): return a LazyData mapping that reads each file on first
+                     access instead of a dict. Defaults to False.
+        lru_size (int): maximum number of dataframes kept in memory in lazy
+                        mode.
+        chunksize (int): if given, every value is an iterator of dataframes
+                         with chunksize rows each, read on demand and typed
+                         as described by the format file. workers and lazy
+                         are ignored in this mode.
+        cache_dir (str): directory of an on-disk columnar cache of parsed
+                         files (requires pyarrow). Entries are also keyed by
+                         the format file. Defaults to None (no cache). Not
+                         used in chunksize mode.
+        engine (str): {'pandas', 'numpy'}, default 'pandas'. 'numpy' slices
+                      the fixed-width fields of the whole file at once with
+                      NumPy, which is much faster on large files and gives
+                      the same results. It does not support chunksize.
+        dtype_policy (str): {'legacy', 'compact'}, default 'legacy'. 'legacy'
+                            reads every numeric field as float32 and strings
+                            as objects. 'compact' uses the narrowest exact
+                            type: nullable Int8/16/32/64 for INTEGER fields
+                            sized from LENGTH, float64 for NUMBER and DECIMAL
+                            and category for low-cardinality STRING fields
+                            (except in chunksize mode).
+        format_index (FormatIndex): index of the format files, reusable
+                                    across calls. Defaults to a new index of
+                                    format_path.
+
+
+    Returns:
+        dict: Name of data file as KEY and dataframe as VALUE.
+
+    """
     if not format_path:
         format_path = dir_path
+    if engine not in TXT_ENGINES:
+        raise ValueError(f"engine must be one of {list(TXT_ENGINES)}")
+    if dtype_policy not in DTYPE_POLICIES:
+        raise ValueError(
+            f"dtype_policy must be one of {list(DTYPE_POLICIES)}")
 
     assignation_map = match_data_format(dir_path, data_extension, format_path,
-                                        format_extension)
-    for txt_file in assignation_map:
-        conversion = dict()
-        assignation_map[txt_file] = pd.read_csv(format_path +
-                                                assignation_map[txt_file],
-                                                sep=sep,
-                                                encoding=encoding)
-        for line in range(len(assignation_map[txt_file])):
-            conversion[assignation_map[txt_file]['FIELD_NAME'][line]
-                       ] = conversion_map[assignation_map[txt_file]
-                                          ['DATA_TYPE'][line]]
-        assignation_map[txt_file] = pd.read_fwf(dir_path + txt_file,
-                                                widths=assignation_map
-                                                [txt_file]['LENGTH'].tolist(),
-                                                names=assignation_map[txt_file]
-                                                ['FIELD_NAME'].tolist(),
-                                                dtype=conversion,
-                                                nwords=0,
-                                                encoding=encoding,
-                                                na_values=na_values,
-                                                delimiter="\n\t")
-        assignation_map[txt_file].name = txt_file
-    return assignation_map
-
-
-def xml(dir_path, pattern='*.[xXkK][mMtTjJ][lLrRbB]'):
+                                        format_extension,
+                                        format_index=format_index)
+    unmatched = [txt_file for txt_file, format_file in assignation_map.items()
+                 if format_file is None]
+    if unmatched:
+        LOGGER.info('Skipping %s text files without a format file: %s',
+                    len(unmatched), ', '.join(unmatched))
+    txt_files = [txt_file for txt_file in assignation_map
+                 if assignation_map[txt_file] is not None]
+    read_txt = partial(_txt_file, sep=sep, encoding=encoding,
+                       na_values=na_values, engine=engine,
+                       dtype_policy=dtype_policy)
+    if chunksize:
+        data = {}
+        for txt_file in txt_files:
+            read_chunks = partial(
+                read_txt, format_path=os.path.join(format_path,
+                                                   assignation_map[txt_file]))
+            data[txt_file] = _iter_chunks(read_chunks,
+                                          os.path.join(dir_path, txt_file),
+                                          txt_file, chunksize)
+        return data
+    read_txt = _cached(read_txt, cache_dir, reader='txt', sep=sep,
+                       encoding=encoding, na_values=na_values,
+                       dtype_policy=dtype_policy)
+    if lazy:
+        return LazyData(
+            txt_files,
+            lambda txt_file: _set_name(
+                read_txt(os.path.join(dir_path, txt_file),
+                         os.path.join(format_path, assignation_map[txt_file])),
+                txt_file),
+            maxsize=lru_size)
+    data = dict(zip(txt_files, _parallel_map(
+        read_txt,
+        [os.path.join(dir_path, txt_file) for txt_file in txt_files],
+        [os.path.join(format_path, assignation_map[txt_file])
+         for txt_file in txt_files],
+        workers=workers, pool=pool)))
+    for txt_file in data:
+        _set_name(data[txt_file], txt_file)
+    return data
+
+
+def _txt_file(data_path, format_path, sep=';', encoding='windows-1252',
+              na_values=None, chunksize=None, engine='pandas',
+              dtype_policy='legacy'):
+    """Read a positional text file using the layout in its format file.
+
+    Args:
+        data_path (str): path to the data file.
+        format_path (str): path to the format file (CSV with FIELD_NAME,
+                           LENGTH and DATA_TYPE columns).
+        sep (str): field separator of the format file.
+        encoding (str): file encoding.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+        chunksize (int): return an iterator of dataframes with chunksize rows
+                         each instead of a single dataframe.
+        engine (str): {'pandas', 'numpy'}, default 'pandas'. Parser used to
+                      split the fixed-width fields. See _read_fwf_numpy().
+        dtype_policy (str): {'legacy', 'compact'}, default 'legacy'. See
+                            _compact_dtypes().
+
+    Returns:
+        DataFrame or TextFileReader if chunksize is given.
+
+    """
+    if engine not in TXT_ENGINES:
+        raise ValueError(f"engine must be one of {list(TXT_ENGINES)}")
+    if dtype_policy not in DTYPE_POLICIES:
+        raise ValueError(
+            f"dtype_policy must be one of {list(DTYPE_POLICIES)}")
+    conversion_map = DTYPE_POLICIES[dtype_policy]
+
+    data_format = pd.read_csv(format_path, sep=sep, encoding=encoding)
+    conversion = dict()
+    for line in range(len(data_format)):
+        conversion[data_format['FIELD_NAME'][line]
+                   ] = conversion_map[data_format['DATA_TYPE'][line]]
+    if engine == 'numpy':
+        if chunksize:
+            raise ValueError("chunksize is only supported by the pandas "
+                             "engine")
+        data = _read_fwf_numpy(data_path,
+                               widths=data_format['LENGTH'].tolist(),
+                               names=data_format['FIELD_NAME'].tolist(),
+                               dtype=conversion,
+                               encoding=encoding,
+                               na_values=na_values)
+    else:
+        data = pd.read_fwf(data_path,
+                           widths=data_format['LENGTH'].tolist(),
+                           names=data_format['FIELD_NAME'].tolist(),
+                           dtype=conversion,
+                           nwords=0,
+                           encoding=encoding,
+                           na_values=na_values,
+                           delimiter="\n\t",
+                           chunksize=chunksize)
+    if dtype_policy == 'legacy':
+        return data
+    if chunksize:
+        # categories would differ from chunk to chunk
+        return closing(_convert_chunks(
+            data, partial(_compact_dtypes, data_format=data_format,
+                          categories=False)))
+    return _compact_dtypes(data, data_format)
+
+
+def _convert_chunks(reader, convert):
+    """Apply a conversion to every chunk of a reader.
+
+    Args:
+        reader (TextFileReader): chunked reader.
+        convert (callable): function receiving and returning a dataframe.
+
+    Yields:
+        DataFrame: converted chunks.
+
+    """
+    with reader:
+        for chunk in reader:
+            yield convert(chunk)
+
+
+def _compact_dtypes(data, data_format, categories=True):
+    """Convert positional data to the narrowest exact types of its layout.
+
+    INTEGER fields (read as strings) become nullable integers sized from
+    their LENGTH: Int8 up to 2 digits, Int16 up to 4, Int32 up to 9 and
+    Int64 up to 18; blank values are NA. Longer INTEGER fields are kept as
+    strings. STRING fields with few distinct values become categoricals.
+
+    Args:
+        data (DataFrame): data read with the 'compact' dtype policy.
+        data_format (DataFrame): layout with FIELD_NAME, LENGTH and
+                                 DATA_TYPE columns.
+        categories (bool): convert low-cardinality STRING fields to
+                           categoricals.
+
+    Returns:
+        DataFrame: the same dataframe with the converted columns.
+
+    """
+    for field, data_type, length in zip(data_format['FIELD_NAME'],
+                                        data_format['DATA_TYPE'],
+                                        data_format['LENGTH']):
+        if data_type == 'INTEGER':
+            int_type = next((int_type for digits, int_type in INTEGER_TYPES
+                             if length <= digits), None)
+            if int_type is not None:
+                digits = data[field].str.strip()
+                na_mask = (digits.isna() | (digits == '')).to_numpy()
+                values = np.zeros(len(data), dtype=np.int64)
+                values[~na_mask] = digits.to_numpy()[~na_mask].astype(
+                    np.int64)
+                data[field] = pd.arrays.IntegerArray(
+                    values.astype(int_type), na_mask)
+        elif data_type == 'STRING' and categories and len(data) and \
+                data[field].nunique() <= len(data) * CATEGORY_RATIO:
+            data[field] = data[field].astype('category')
+    return data
+
+
+def _read_fwf_numpy(path, widths, names, dtype, encoding='windows-1252',
+                    na_values=None):
+    """Read a fixed-width file slicing its fields with NumPy.
+
+    The file is read as a single buffer (memory-mapped for ASCII compatible
+    single-byte encodings, decoded to UCS-4 otherwise) and every field is
+    taken from all the lines at once by its fixed offsets, so types are
+    converted in bulk instead of line by line. Results are the same as
+    pandas.read_fwf() with delimiter="\\n\\t": whitespace-only lines are
+    skipped, fields keep their spaces, fields beyond the end of a short line
+    are NaN and NA strings are matched against the raw field.
+
+    Args:
+        path (str): path to the data file.
+        widths (list): width of every field.
+        names (list): name of every field.
+        dtype (dict): field names as KEYS and types (str or a numpy numeric
+                      type) as VALUES.
+        encoding (str): file encoding.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+
+    Returns:
+        DataFrame.
+
+    """
+    if os.path.getsize(path) == 0:
+        # pandas.read_fwf() returns the layout columns without rows
+        return pd.DataFrame(columns=names).astype(
+            {name: dtype.get(name, str) for name in names})
+    units = _fwf_units(path, encoding)
+    starts, lengths = _fwf_lines(units)
+    offsets = np.cumsum([0] + list(widths))
+    rows = _fwf_rows(units, starts, lengths, offsets[-1])
+    # tabs are stripped from both ends of every field
+    strip_tabs = bool((units == 9).any())
+    columns = {}
+    for name, start, end in zip(names, offsets[:-1], offsets[1:]):
+        values = _fwf_field(units, starts, lengths, rows, start, end)
+        if strip_tabs:
+            values = np.char.strip(values, b'\t' if values.dtype.kind == 'S'
+                                   else '\t')
+        na_strings, na_numbers = _fwf_na_values(na_values, name)
+        if values.dtype.kind == 'S':
+            na_strings = [value.encode(encoding, errors='ignore')
+                          for value in na_strings]
+        na_mask = np.zeros(len(values), dtype=bool)
+        for na_string in na_strings:
+            if len(na_string) <= end - start:
+                na_mask |= values == na_string
+        cast_type = dtype.get(name, str)
+        if cast_type in (str, object):
+            if values.dtype.kind == 'S':
+                try:
+                    values = values.astype(f'U{end - start}')
+                except UnicodeDecodeError:
+                    values = np.char.decode(values, encoding)
+            column = values.astype(object)
+            column[na_mask] = np.nan
+        else:
+            column = np.full(len(values), np.nan)
+            try:
+                column[~na_mask] = values[~na_mask].astype(np.float64)
+            except ValueError as error:
+                raise ValueError(f"Unable to convert column {name} to type "
+                                 f"{np.dtype(cast_type)}") from error
+            if na_numbers:
+                column[np.isin(column, list(na_numbers))] = np.nan
+            column = column.astype(cast_type)
+        columns[name] = column
+    return pd.DataFrame(columns, columns=names)
+
+
+def _fwf_units(path, encoding):
+    """Read a text file as a flat array of code units.
+
+    Args:
+        path (str): path to the file.
+        encoding (str): file encoding.
+
+    Returns:
+        ndarray: uint8 memory-mapped array of bytes for ASCII compatible
+                 single-byte encodings, uint32 array of UCS-4 code points
+                 otherwise.
+
+    """
+    sample = 'abcXYZ019 .,;-_\t\n\r'
+    single_byte = sample.encode(encoding, errors='ignore') == \
+        sample.encode('ascii') and \
+        all(len(char.encode(encoding, errors='ignore')) <= 1
+            for char in '\u00e9\u20ac\u00f1\u0436\u03a9\u4e2d')
+    if single_byte:
+        return np.memmap(path, dtype=np.uint8, mode='r')
+    with open(path, 'rb') as data_file:
+        text = data_file.read().decode(encoding)
+    return np.frombuffer(text.lstrip('\ufeff').encode('utf-32-le'),
+                         dtype='<u4')
+
+
+def _fwf_lines(units):
+    """Find the start and length of every non blank line.
+
+    Both '\\n' and '\\r' end a line; the empty line found between the two
+    characters of a '\\r\\n' terminator is skipped as any other blank
+    line.
+
+    Args:
+        units (ndarray): code units of the file.
+
+    Returns:
+        tuple: arrays with the start offset and length of every line.
+
+    """
+    breaks = np.flatnonzero((units == 10) | (units == 13))
+    starts = np.concatenate(([0], breaks + 1))
+    lengths = np.concatenate((breaks, [len(units)])) - starts
+    # blank: tab, line feed, vertical tab, form feed, carriage return, space
+    non_blank = (units != 32) & ((units < 9) | (units > 13))
+    filled = lengths > 0
+    filled[filled] = np.logical_or.reduceat(non_blank, starts[filled])
+    return starts[filled], lengths[filled]
+
+
+def _fwf_rows(units, starts, lengths, width):
+    """Return a zero-copy 2D view of the lines if they are evenly spaced.
+
+    Args:
+        units (ndarray): code units of the file.
+        starts (ndarray): start offset of every line.
+        lengths (ndarray): length of every line.
+        width (int): total width of the record layout.
+
+    Returns:
+        ndarray: (lines, width) view of units, or None if lines differ in
+                 length, are shorter than the layout or are not evenly
+                 spaced.
+
+    """
+    if len(starts) < 2 or lengths.min() < width or \
+            lengths.max() != lengths.min():
+        return None
+    stride = starts[1] - starts[0]
+    if not (np.diff(starts) == stride).all():
+        return None
+    return np.lib.stride_tricks.as_strided(
+        units[starts[0]:], shape=(len(starts), width),
+        strides=(stride * units.itemsize, units.itemsize), writeable=False)
+
+
+def _fwf_field(units, starts, lengths, rows, start, end):
+    """Slice a field from every line as a fixed-width string array.
+
+    Args:
+        units (ndarray): code units of the file.
+        starts (ndarray): start offset of every line.
+        lengths (ndarray): length of every line.
+        rows (ndarray): 2D view of the lines, or None.
+        start (int): field start offset in the line.
+        end (int): field end offset in the line.
+
+    Returns:
+        ndarray: bytes (S) or unicode (U) array, one item per line. Parts
+                 beyond the end of a line are left out.
+
+    """
+    width = end - start
+    if rows is not None:
+        cells = np.ascontiguousarray(rows[:, start:end])
+    else:
+        columns = np.arange(start, end)
+        positions = np.minimum(starts[:, None] + columns, len(units) - 1)
+        cells = np.where(columns < lengths[:, None], units[positions],
+                         0).astype(units.dtype)
+    kind = 'S' if units.dtype == np.uint8 else '<U'
+    return cells.view(f'{kind}{width}').ravel()
+
+
+def _fwf_na_values(na_values, column):
+    """Build the NA strings and numbers that apply to a column.
+
+    Args:
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+        column (str): column name.
+
+    Returns:
+        tuple: set of NA strings and set of NA numbers.
+
+    """
+    if isinstance(na_values, dict):
+        na_values = na_values.get(column)
+    if na_values is None:
+        na_values = []
+    elif isinstance(na_values, str) or not pd.api.types.is_list_like(
+            na_values):
+        na_values = [na_values]
+    na_strings = set(DEFAULT_NA_VALUES)
+    na_numbers = set()
+    for value in na_values:
+        na_strings.add(str(value))
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            continue
+        if not np.isnan(number):
+            na_numbers.add(number)
+            na_strings.add(str(number))
+            if number.is_integer():
+                na_strings.add(str(int(number)))
+    return na_strings, na_numbers
+
+
+def iter_txt(dir_path, sep=';', encoding='windows-1252',
+             format_extension='*.[cC][sS][vV]',
+             data_extension='*.[tT][xX][tT]', na_values=None,
+             format_path=None, prefetch=False, engine='pandas',
+             dtype_policy='legacy'):
+    """Read positional text files from a directory one at a time.
+
+    Generator counterpart of txt(): only one dataframe is held in memory at
+    a time. Files are yielded in sorted name order.
+
+    Args:
+        dir_path (str): directory containing data files.
+        sep (str): field separator.
+        encoding (str): file encoding.
+        format_extension (str): standard for format name.
+        data_extension (str): standard for data name.
+        na_values (scalar, str, list-like, or dict) : Additional strings to
+                                                      recognize as NA/NaN.
+        format_path (str): directory containing format files.
+                           Defaults to dir_path.
+        prefetch (bool): parse the next file in a background thread while the
+                         current one is processed. Defaults to False.
+        engine (str): {'pandas', 'numpy'}, default 'pandas'. See txt().
+        dtype_policy (str): {'legacy', 'compact'}, default 'legacy'. See
+                            txt().
+
+    Yields:
+        tuple: Name of data file and dataframe.
+
+    """
+    yield from _iter_data(txt(dir_path, sep=sep, encoding=encoding,
+                              format_extension=format_extension,
+                              data_extension=data_extension,
+                              na_values=na_values, format_path=format_path,
+                              lazy=True, lru_size=0, engine=engine,
+                              dtype_policy=dtype_policy),
+                          prefetch=prefetch)
+
+
+def xml(dir_path, pattern='*.[xXkK][mMtTjJ][lLrRbB]', record_path=None,
+        fields=None, namespaces=None, chunksize=None):
     """Massively read XML files from a directory.
 
     Read files in a directory filtered by regEx and generate a dict with xml
     file names as keys and etree objects as values.
 
+    If record_path is given, files are parsed incrementally instead and
+    every element matching it becomes a row of a dataframe. See
+    iter_xml_records().
+
     Args:
         dir_path (str): directory containing XML files.
         pattern (str): regEx to filter data names.
+        record_path (str): path of the record elements, e.g.
+                           'transformation/step'. Defaults to None (return
+                           etree objects).
+        fields (dict): column names as KEYS and paths relative to the record
+                       element as VALUES. See iter_xml_records().
+        namespaces (dict): prefixes as KEYS and namespace URIs as VALUES,
+                           usable in record_path and fields.
+        chunksize (int): if given with record_path, every value is an
+                         iterator of dataframes with chunksize rows each,
+                         parsed on demand.
+
+    Returns:
+        dict: XML name as KEY and etree object (or dataframe) as VALUE.
+
+    """
+    xml_files = _scan_dir(dir_path, pattern)
+    if record_path is None:
+        return {file: ET.parse(path) for file, path in xml_files.items()}
+    records = partial(iter_xml_records, record_path=record_path,
+                      fields=fields, namespaces=namespaces)
+    columns = list(fields) if fields else None
+    if chunksize:
+        return {file: _iter_xml_chunks(records(path), columns, chunksize,
+                                       file)
+                for file, path in xml_files.items()}
+    return {file: _set_name(pd.DataFrame.from_records(list(records(path)),
+                                                      columns=columns), file)
+            for file, path in xml_files.items()}
+
+
+def iter_xml_records(filename, record_path, fields=None, namespaces=None):
+    """Read records from an XML file with incremental parsing.
+
+    The file is parsed with defusedxml iterparse, with the protections of
+    xml(), and every record element is discarded once read, as well as the
+    elements containing records once they are closed, so memory use does
+    not grow with the number of records.
+
+    record_path is a '/' separated sequence of tags matched against the
+    innermost elements being parsed ('step' matches every step element,
+    '/transformation/step' only the children of the root). Tags may be
+    '*', '{*}tag' (any namespace), '{uri}tag' or 'prefix:tag'.
+
+    Field paths are evaluated on the record element: '.' is its text, '@id'
+    an attribute, 'name' or 'order/hop/from' the text of a descendant and
+    'value/@id' an attribute of a descendant. Leading '../' steps move to an
+    ancestor of the record, of which the attributes and the elements parsed
+    before the record, except previous records, are available.
+
+    Args:
+        filename (str): path to the XML file.
+        record_path (str): path of the record elements.
+        fields (dict): column names as KEYS and field paths as VALUES.
+                       Defaults to None (attributes of the record and texts
+                       of its children, by local name).
+        namespaces (dict): prefixes as KEYS and namespace URIs as VALUES.
+
+    Yields:
+        dict: field names as KEYS and field values (None if missing) as
+              VALUES.
+
+    """
+    namespaces = namespaces or {}
+    anchored = record_path.startswith('/')
+    steps = [_xml_tag(step, namespaces)
+             for step in record_path.strip('/').split('/')]
+    fields = {name: _xml_field(expression, namespaces)
+              for name, expression in (fields or {}).items()}
+    # open elements and whether they are or contain records
+    stack, tags, records = [], [], 0
+    for event, element in ET.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            tags.append(element.tag)
+            is_record = _xml_match(tags, steps, anchored)
+            records += is_record
+            stack.append([element, is_record, False])
+            continue
+        _, is_record, has_records = stack.pop()
+        tags.pop()
+        if is_record:
+            records -= 1
+            if fields:
+                ancestors = [entry[0] for entry in stack]
+                yield {name: _xml_value(element, ancestors, field)
+                       for name, field in fields.items()}
+            else:
+                record = dict(element.attrib)
+                for child in element:
+                    record[child.tag.rpartition('}')[2]] = child.text
+                yield record
+        if stack and (is_record or has_records):
+            stack[-1][2] = True
+            if not records:
+                # processed records are no longer needed
+                stack[-1][0].remove(element)
+
+
+def _xml_tag(step, namespaces):
+    """Expand a 'prefix:tag' path step to the {uri}tag notation."""
+    prefix, colon, tag = step.partition(':')
+    if not colon or step.startswith('{'):
+        return step
+    if prefix not in namespaces:
+        raise ValueError(f"Unknown namespace prefix '{prefix}'")
+    return '{' + namespaces[prefix] + '}' + tag
+
+
+def _xml_match(tags, steps, anchored):
+    """Check whether the innermost open tags match a record path.
+
+    Args:
+        tags (list): tags of the open elements, from the root.
+        steps (list): tags of the record path, with wildcards.
+        anchored (bool): match from the root instead of the innermost tag.
+
+    Returns:
+        bool: True if the last open element is a record.
+
+    """
+    if len(tags) < len(steps) or anchored and len(tags) != len(steps):
+        return False
+    for tag, step in zip(tags[-len(steps):], steps):
+        if step == '*' or step == tag:
+            continue
+        if step.startswith('{*}') and tag.rpartition('}')[2] == step[3:]:
+            continue
+        return False
+    return True
+
+
+def _xml_field(expression, namespaces):
+    """Split a field path into ancestor levels, element path and attribute.
+
+    Args:
+        expression (str): field path, as described in iter_xml_records().
+        namespaces (dict): prefixes as KEYS and namespace URIs as VALUES.
 
     Returns:
-        dict: XML name as KEY and etree object as VALUE.
+        tuple: number of leading '../' steps, path of the element relative
+               to the record (or ancestor) and attribute name (or None).
 
     """
-    xml_list = []
-    os.chdir(dir_path)
-    for file in os.listdir('.'):
-        if fnmatch.fnmatch(file, pattern):
-            xml_list.append(file)
-    xml_list = set(xml_list)
-    xml_list = list(xml_list)
-    df_dict = dict.fromkeys(xml_list, '')
+    levels = 0
+    while expression.startswith('../') or expression == '..':
+        levels += 1
+        expression = expression[3:]
+    path, at, attribute = expression.rpartition('@')
+    if not at:
+        path, attribute = expression, None
+    else:
+        attribute = _xml_tag(attribute, namespaces)
+    path = '/'.join(_xml_tag(step, namespaces)
+                    for step in path.rstrip('/').split('/') if step)
+    return levels, path or '.', attribute
+
+
+def _xml_value(element, ancestors, field):
+    """Evaluate a field of a record element.
+
+    Args:
+        element (Element): record element.
+        ancestors (list): open ancestors of the record, from the root.
+        field (tuple): field, as returned by _xml_field().
+
+    Returns:
+        str: field value, or None if it is missing.
+
+    """
+    levels, path, attribute = field
+    if levels:
+        if levels > len(ancestors):
+            return None
+        element = ancestors[-levels]
+    if path != '.':
+        element = element.find(path)
+        if element is None:
+            return None
+    if attribute:
+        return element.get(attribute)
+    return element.text
+
+
+def _iter_xml_chunks(records, columns, chunksize, name=None):
+    """Group XML records into dataframes of chunksize rows.
+
+    Args:
+        records (iterator): records, as yielded by iter_xml_records().
+        columns (list): column names. None takes them from the records.
+        chunksize (int): number of rows per chunk.
+        name (str): name given to every chunk.
 
-    for i in enumerate(xml_list):  # warning: enumerate returns tuples
-        df_dict[xml_list[i[0]]] = ET.parse(dir_path + xml_list[i[0]])
-    return df_dict
+    Yields:
+        DataFrame: chunks with a RangeIndex continuing the previous chunk.
+
+    """
+    start = 0
+    while True:
+        rows = list(islice(records, chunksize))
+        if not rows:
+            return
+        chunk = pd.DataFrame.from_records(
+            rows, columns=columns,
+            index=pd.RangeIndex(start, start + len(rows)))
+        start += len(rows)
+        yield _set_name(chunk, name)
 
 
 def sql(dir_path):
@@ -384,23 +2451,120 @@ def sql(dir_path):
         dict: query name  as KEY and query as VALUE.
 
     """
-    files = {}
-    os.chdir(dir_path)
-    with ExitStack() as context_manager:
-        for filename in os.listdir('.'):
-            if fnmatch.fnmatch(filename, '*.sql'):
-                sql_file = context_manager.enter_context(open(filename, 'r'))
-                files[filename.split(dir_path, 1)[-1][:-4]] = sql_file.read()
-        context_manager.pop_all().close()
-    return files
+    return {filename[:-4]: _sql_file(path)
+            for filename, path in _scan_dir(dir_path, '*.sql').items()}
 
 
-def _html_table_file(path, encoding='windows-1252', na_values=None):
+def _html_table_file(path, encoding='windows-1252', na_values=None,
+                     engine='bs4', tables=None):
     """Read a html file, find the first table and return it as a DataFrame.
 
     Args:
         path (str): path to the file.
         encoding (str): file encoding.
+        engine (str): {'bs4', 'fast'}, default 'bs4'. Parser of the file.
+                      See html_table().
+        tables (str, int or list): selectors of the tables to read instead
+                                   of the first one. See html_table().
+
+    Returns:
+        DataFrame, or list of DataFrames if tables is given.
+
+    """
+    if engine == 'fast':
+        html_tables = _html_tables_fast(path, encoding,
+                                        all_tables=tables is not None)
+    else:
+        html_tables = _html_tables_bs4(path, encoding,
+                                       all_tables=tables is not None)
+    if tables is None:
+        if not html_tables:
+            raise IndexError("No table found in " + path)
+        return _html_table_frame(*html_tables[0][1:])
+    return [_html_table_frame(*html_tables[position][1:])
+            for position in _select_tables(
+                [attributes for attributes, _, _ in html_tables], tables)]
+
+
+def _html_tables_bs4(path, encoding='windows-1252', all_tables=False):
+    """Read the cells of the tables of a html file with BeautifulSoup.
+
+    Args:
+        path (str): path to the file.
+        encoding (str): file encoding.
+        all_tables (bool): read every table instead of the first one.
+
+    Returns:
+        list: (attributes, header cells, rows) tuples of the tables in
+              document order. Header cells are (text, colspan) pairs of
+              every th tag in the table and rows are (number of td tags,
+              texts of the children) pairs of every tr tag in the table.
+
+    """
+    with open(path, mode='r', encoding=encoding) as html_file:
+        _soup = BeautifulSoup(html_file, 'html.parser')
+    html_tables = []
+    for _table in _soup.find_all('table', limit=None if all_tables else 1):
+        header_cells = [(column.get_text(), column.attrs.get('colspan'))
+                        for column in _table.find_all('th')]
+        rows = []
+        for row in _table.find_all('tr'):
+            _texts = []
+            for column in row:
+                try:
+                    _texts.append(column.get_text())
+                except Exception:
+                    continue
+            rows.append((len(row.find_all('td')), _texts))
+        attributes = {'id': _table.attrs.get('id'),
+                      'class': _table.attrs.get('class') or []}
+        html_tables.append((attributes, header_cells, rows))
+    return html_tables
+
+
+def _select_tables(attributes, tables):
+    """Select html tables by position, id or class.
+
+    Args:
+        attributes (list): id and class list of every table, in document
+                           order.
+        tables (str, int or list): 'all', zero-based positions, '#id' or
+                                   '.class' selectors.
+
+    Returns:
+        list: positions of the selected tables in document order. Selectors
+              matching no table are ignored.
+
+    """
+    if isinstance(tables, (str, int)):
+        tables = [tables]
+    selected = set()
+    for selector in tables:
+        if isinstance(selector, int):
+            if -len(attributes) <= selector < len(attributes):
+                selected.add(selector % len(attributes))
+        elif selector == 'all':
+            selected.update(range(len(attributes)))
+        elif selector[:1] == '#':
+            selected.update(position
+                            for position, table in enumerate(attributes)
+                            if table['id'] == selector[1:])
+        elif selector[:1] == '.':
+            selected.update(position
+                            for position, table in enumerate(attributes)
+                            if selector[1:] in table['class'])
+        else:
+            raise ValueError(f"Invalid table selector '{selector}'")
+    return sorted(selected)
+
+
+def _html_table_frame(header_cells, rows):
+    """Build the dataframe of a html table from its cells.
+
+    Args:
+        header_cells (list): (text, colspan) pairs of the th tags.
+        rows (list): (number of td tags, texts of the children) pairs of the
+                     tr tags.
 
     Returns:
         DataFrame.
@@ -408,19 +2572,15 @@ def _html_table_file(path, encoding='windows-1252', na_values=None):
     """
     data = []
     headers = []
-
-    _soup = BeautifulSoup(
-        open(path, mode='r', encoding=encoding), 'html.parser')
-    _html_thead = _soup.find_all('table', limit=1)[0].find_all('th')
     _row_headers = 0
 
     # Case there are th tags (with or whitout colspan)
     _extra_header_label = []
-    for index, column in enumerate(_html_thead):
+    for index, (text, colspan) in enumerate(header_cells):
         _row_headers = 1
-        _value = column.get_text().strip()
+        _value = text.strip()
         try:
-            _colspan = int(column.attrs.get('colspan'))
+            _colspan = int(colspan)
             if _colspan <= 1:
                 headers.append(_value)
             else:
@@ -434,7 +2594,7 @@ def _html_table_file(path, encoding='windows-1252', na_values=None):
     _count_cols = 0
     for item in _extra_header_label:
         for _position in range(item.get('colspan')):
-            _new_label = _html_thead[item.get('index')].get_text() + '_' + \
+            _new_label = header_cells[item.get('index')][0] + '_' + \
                 headers[item.get('index')+_count_cols+_position]
             _new_labels.append((_new_label,
                                 item.get(
@@ -446,33 +2606,24 @@ def _html_table_file(path, encoding='windows-1252', na_values=None):
         headers[label[1]] = label[0]
 
     # Case there aren't th tags
-    _html_rows = _soup.find_all('table', limit=1)[0].find_all('tr')
     if headers == []:
         _num_columns = 0
-        for index, row in enumerate(_html_rows):
-            if len(row.find_all('td')) > _num_columns:
-                _num_columns = len(row.find_all('td'))
+        for index, (_num_cells, _) in enumerate(rows):
+            if _num_cells > _num_columns:
+                _num_columns = _num_cells
                 _row_headers = index
-        _html_header = _html_rows[_row_headers]
-        for column in _html_header:
-            try:
-                _value = column.get_text().strip()
-                if _value != '\n' and _value != '':
-                    headers.append(_value)
-            except Exception:
-                continue
+        for text in rows[_row_headers][1]:
+            _value = text.strip()
+            if _value != '\n' and _value != '':
+                headers.append(_value)
 
     # Add to data each _row
-    html_data = _html_rows[_row_headers+1:]
-    for row in html_data:
+    for _, texts in rows[_row_headers+1:]:
         _row = []
-        for column in row:
-            try:
-                _value = column.get_text().strip()
-                if _value != '':
-                    _row.append(_value)
-            except Exception:
-                continue
+        for text in texts:
+            _value = text.strip()
+            if _value != '':
+                _row.append(_value)
         data.append(_row)
 
     # Build _dataframe
@@ -480,22 +2631,423 @@ def _html_table_file(path, encoding='windows-1252', na_values=None):
     return _dataframe
 
 
+def _html_tables_fast(path, encoding='windows-1252', all_tables=False,
+                      block_size=1 << 16):
+    """Read the cells of the tables of a html file in a single pass.
+
+    The file is read with the standard library html parser, building only
+    the elements of the tables. Unless all_tables is set, reading stops once
+    the first table is closed. Tags are nested and closed as BeautifulSoup
+    does with 'html.parser', so the results are the same as
+    _html_tables_bs4().
+
+    Args:
+        path (str): path to the file.
+        encoding (str): file encoding.
+        all_tables (bool): read every table instead of the first one.
+        block_size (int): number of characters read at a time.
+
+    Returns:
+        list: (attributes, header cells, rows) tuples, as returned by
+              _html_tables_bs4().
+
+    """
+    parser = _HTMLTableParser(all_tables=all_tables)
+    with open(path, mode='r', encoding=encoding) as html_file:
+        while not parser.done:
+            block = html_file.read(block_size)
+            if not block:
+                parser.close()
+                break
+            parser.feed(block)
+    html_tables = []
+    for table in parser.tables:
+        header_cells = [(_html_text(node), node[1].get('colspan'))
+                        for node in table['header_cells']]
+        rows = [(row[0], [child if isinstance(child, str)
+                          else _html_text(child) for child in row[1][2]])
+                for row in table['rows']]
+        attributes = {'id': table['node'][1].get('id'),
+                      'class': table['node'][1].get('class', '').split()}
+        html_tables.append((attributes, header_cells, rows))
+    return html_tables
+
+
+class _HTMLTableParser(HTMLParser):
+    """Collect the elements of the tables of a html document.
+
+    Elements are [tag, attributes, children] lists and children are
+    elements or strings. Comments are dropped, as their text is ignored.
+    Every table is a dict with its element, its th elements and its rows,
+    [number of td tags, tr element] lists, including those of nested
+    tables.
+
+    """
+
+    # elements closed as soon as they are opened
+    VOID_TAGS = {
+        'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command',
+        'embed', 'frame', 'hr', 'image', 'img', 'input', 'isindex',
+        'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source',
+        'spacer', 'track', 'wbr'
+    }
+
+    def __init__(self, all_tables=False):
+        """Initialize an empty parser.
+
+        Args:
+            all_tables (bool): read every table instead of stopping after
+                               the first one.
+
+        """
+        super().__init__(convert_charrefs=True)
+        self.all_tables = all_tables
+        # tag and element (None outside tables) of every open element
+        self.open_tags = []
+        self.open_tables = []
+        self.open_rows = []
+        self.tables = []
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        """Open an element, building it if it is in a table."""
+        if self.done:
+            return
+        node = None
+        if self.open_tables or tag == 'table':
+            node = [tag, {name: '' if value is None else value
+                          for name, value in attrs}, []]
+            if self.open_tables:
+                self.open_tags[-1][1][2].append(node)
+            if tag == 'table':
+                self.tables.append({'node': node, 'header_cells': [],
+                                    'rows': []})
+                self.open_tables.append(self.tables[-1])
+            elif tag == 'th':
+                for table in self.open_tables:
+                    table['header_cells'].append(node)
+            elif tag == 'tr':
+                row = [0, node]
+                for table in self.open_tables:
+                    table['rows'].append(row)
+                self.open_rows.append(row)
+            elif tag == 'td':
+                for row in self.open_rows:
+                    row[0] += 1
+        if tag not in self.VOID_TAGS:
+            self.open_tags.append((tag, node))
+
+    def handle_endtag(self, tag):
+        """Close the last open element with this tag and those inside it."""
+        if self.done:
+            return
+        for position in range(len(self.open_tags) - 1, -1, -1):
+            if self.open_tags[position][0] == tag:
+                break
+        else:
+            return
+        for _, node in self.open_tags[position:]:
+            if node is None:
+                continue
+            if node[0] == 'table':
+                self.open_tables = [table for table in self.open_tables
+                                    if table['node'] is not node]
+                if not self.all_tables and node is self.tables[0]['node']:
+                    self.done = True
+            elif node[0] == 'tr':
+                self.open_rows = [row for row in self.open_rows
+                                  if row[1] is not node]
+        del self.open_tags[position:]
+
+    def handle_data(self, data):
+        """Add text to the open element of a table."""
+        if self.open_tables and not self.done:
+            self.open_tags[-1][1][2].append(data)
+
+
+def _html_text(node):
+    """Return the text of an element, as BeautifulSoup get_text() does."""
+    texts = []
+    for child in node[2]:
+        if isinstance(child, str):
+            texts.append(child)
+        elif child[0] not in ('script', 'style', 'template'):
+            texts.append(_html_text(child))
+    return ''.join(texts)
+
+
 def html_table(dir_path, encoding='windows-1252',
-               data_extension='*.[hH][tT][mM][lL]'):
+               data_extension='*.[hH][tT][mM][lL]', workers=None,
+               pool='process', engine='bs4', tables=None):
     """Massively read positional html files from a directory.
 
     Args:
         dir_path (str): directory containing data files.
         encoding (str): file encoding.
         data_extension (str): standard for data name.
+        workers (int): number of files parsed concurrently. Defaults to None
+                       (serial reading).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used when workers > 1.
+        engine (str): {'bs4', 'fast'}, default 'bs4'. Parser of the files.
+                      'fast' reads each file in a single pass with the
+                      standard library html parser, builds only the tables
+                      and stops reading once the first one is closed (unless
+                      tables is given), giving the same results as
+                      BeautifulSoup.
+        tables (str, int or list): read several tables of every file from a
+                                   single parse instead of the first one:
+                                   'all', zero-based positions in document
+                                   order (nested tables included), '#id' or
+                                   '.class' selectors, or a list of them.
+                                   Defaults to None (first table only).
 
     Returns:
-        dict: Name of data file as KEY and dataframe as VALUE.
+        dict: Name of data file as KEY and dataframe as VALUE, or list of
+              dataframes of the selected tables, in document order, if
+              tables is given.
 
     """
-    os.chdir(dir_path)
-    data = {}
-    for file in os.listdir('.'):
-        if fnmatch.fnmatch(file, data_extension):
-            data[file] = _html_table_file(dir_path+file, encoding)
+    if engine not in HTML_ENGINES:
+        raise ValueError(f"engine must be one of {list(HTML_ENGINES)}")
+    files = _scan_dir(dir_path, data_extension)
+    read_html = partial(_html_table_file, encoding=encoding, engine=engine,
+                        tables=tables)
+    data = dict(zip(files, _parallel_map(read_html, files.values(),
+                                         workers=workers, pool=pool)))
+    for file in data:
+        for html_table_data in (data[file] if tables is not None
+                                else [data[file]]):
+            _set_name(html_table_data, file)
     return data
+
+
+def register_reader(name, patterns, loader, key=None, prepare=None):
+    """Register the reader used by extract() for a file format.
+
+    Registering an existing name replaces its reader. Files are routed to
+    the first reader, in registration order, with a matching pattern.
+
+    Args:
+        name (str): format name, key of the results of extract().
+        patterns (str or list): shell-style patterns of the file names.
+        loader (callable): function receiving a path and the reader options
+                           as keyword arguments and returning its data. It
+                           must be picklable (module level) to be used with
+                           a process pool.
+        key (callable): function receiving a file name and returning its key
+                        in the results. Defaults to the file name.
+        prepare (callable): function receiving the list of paths routed to
+                            the reader and its options and returning a list
+                            with the options of every path, or None for the
+                            paths to skip. Runs in the calling process
+                            before any file is read.
+
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    READERS[name] = {'patterns': tuple(patterns), 'loader': loader,
+                     'key': key, 'prepare': prepare}
+
+
+def extract(path, formats=None, recursive=False, workers=None,
+            pool='process', options=None, errors=None):
+    """Read every supported file of a directory in a single pass.
+
+    The directory is scanned once and every file is routed to the first
+    registered reader (see register_reader()) whose patterns match its name.
+    All files are then read on one shared pool of workers, largest first.
+    A file that fails to be read does not stop the others.
+
+    Args:
+        path (str): directory containing data files.
+        formats (list): names of the readers used, in routing order.
+                        Defaults to every registered reader: 'csv', 'xls',
+                        'xlsx', 'px', 'txt', 'sql', 'xml' and 'html'.
+        recursive (bool): scan subdirectories too. Keys are then paths
+                          relative to path. Defaults to False.
+        workers (int): number of files read concurrently. Defaults to None
+                       (serial reading).
+        pool (str): {'process', 'thread'}, default 'process'. Kind of worker
+                    pool used when workers > 1.
+        options (dict): format names as KEYS and dicts of reader options as
+                        VALUES, e.g. {'csv': {'sep': ','}, 'txt':
+                        {'format_path': 'formats/'}}. Positional text files
+                        are only read when a format_path with their layouts
+                        is given; otherwise they are skipped.
+        errors (dict): if given, collects the error of every file that could
+                       not be read by its path relative to path, instead of
+                       raising the first one once every file has been read.
+
+    Returns:
+        dict: format names as KEYS and dicts with file keys and data, as
+              returned by the single-format readers, as VALUES.
+
+    """
+    if formats is None:
+        formats = list(READERS)
+    unknown = [name for name in formats if name not in READERS]
+    if unknown:
+        raise ValueError(f"Unknown formats {unknown}, registered formats "
+                         f"are {list(READERS)}")
+    options = options or {}
+    routed = {name: [] for name in formats}
+    for entry in _scan_tree(path, recursive):
+        for name in formats:
+            if any(fnmatch.fnmatch(entry[1], pattern)
+                   for pattern in READERS[name]['patterns']):
+                routed[name].append(entry)
+                break
+    tasks = []
+    for name, entries in routed.items():
+        reader = READERS[name]
+        reader_options = options.get(name, {})
+        file_options = [reader_options] * len(entries)
+        if reader['prepare'] and entries:
+            file_options = reader['prepare'](
+                [entry[2] for entry in entries], **reader_options)
+        for entry, loader_options in zip(entries, file_options):
+            if loader_options is None:
+                continue
+            relative_dir, filename, file_path, size = entry
+            key = reader['key'](filename) if reader['key'] else filename
+            tasks.append((size, name, os.path.join(relative_dir, key),
+                          partial(reader['loader'], file_path,
+                                  **loader_options),
+                          os.path.join(relative_dir, filename)))
+    tasks.sort(key=lambda task: task[0], reverse=True)
+    results = _parallel_map(_call, [task[3] for task in tasks],
+                            workers=workers, pool=pool)
+    data = {name: {} for name in formats}
+    failures = {}
+    for (_, name, key, _, file), (result, error) in zip(tasks, results):
+        if error is not None:
+            LOGGER.error('Unable to read %s as %s: %s', file, name, error)
+            failures[file] = error
+            continue
+        if isinstance(result, pd.DataFrame):
+            _set_name(result, key)
+        elif isinstance(result, dict) and \
+                all(isinstance(value, pd.DataFrame)
+                    for value in result.values()):
+            _set_sheet_names(result)
+        data[name][key] = result
+    if failures and errors is None:
+        raise failures[min(failures)]
+    if errors is not None:
+        errors.update(failures)
+    return {name: dict(sorted(data[name].items())) for name in formats}
+
+
+def _scan_tree(dir_path, recursive=False):
+    """List the files of a directory, optionally with its subdirectories.
+
+    Args:
+        dir_path (str): directory to scan.
+        recursive (bool): scan subdirectories too.
+
+    Returns:
+        list: (directory relative to dir_path, file name, absolute path,
+              size) tuples sorted by relative path.
+
+    """
+    files = []
+    pending = ['']
+    while pending:
+        relative_dir = pending.pop()
+        with os.scandir(os.path.join(dir_path, relative_dir)) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files.append((relative_dir, entry.name,
+                                  os.path.abspath(entry.path),
+                                  entry.stat().st_size))
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    pending.append(os.path.join(relative_dir, entry.name))
+    return sorted(files, key=lambda entry: os.path.join(entry[0], entry[1]))
+
+
+def _call(func):
+    """Call a function without arguments (picklable task runner).
+
+    Returns:
+        tuple: result and None, or None and the raised exception.
+
+    """
+    try:
+        return func(), None
+    except Exception as error:
+        return None, error
+
+
+def _csv_file(path, **options):
+    """Read a CSV file with the defaults of csv()."""
+    options = {'encoding': 'utf-8', 'sep': ';', **options}
+    return pd.read_csv(path, **options)
+
+
+def _sql_file(path):
+    """Read the content of a SQL file."""
+    with open(path, 'r') as sql_file:
+        return sql_file.read()
+
+
+def _prepare_txt(paths, format_path=None,
+                 format_extension='*.[cC][sS][vV]', **options):
+    """Match positional text files with their format files.
+
+    Without format_path, or without format files in it, no layout can be
+    matched and every text file is skipped. So are the text files sharing no
+    characters with any format filename.
+
+    Args:
+        paths (list): paths to the data files.
+        format_path (str): directory containing format files.
+        format_extension (str): standard for format filenames extensions.
+        **options: other options of _txt_file().
+
+    Returns:
+        list: options of _txt_file() for every path, or None for the paths
+              to skip.
+
+    """
+    if not format_path:
+        LOGGER.info('Skipping %s text files: no format_path given',
+                    len(paths))
+        return [None] * len(paths)
+    try:
+        index = FormatIndex(format_path, format_extension)
+    except FileNotFoundError:
+        if not os.path.isdir(format_path):
+            raise
+        LOGGER.info('Skipping %s text files: no format files in %s',
+                    len(paths), format_path)
+        return [None] * len(paths)
+    matches = index.match([os.path.basename(path) for path in paths])
+    unmatched = [name for name, match in matches.items() if match is None]
+    if unmatched:
+        LOGGER.info('Skipping %s text files without a format file: %s',
+                    len(unmatched), ', '.join(unmatched))
+    return [{'format_path': os.path.join(format_path,
+                                         matches[os.path.basename(path)]),
+             **options} if matches[os.path.basename(path)] else None
+            for path in paths]
+
+
+def _xml_file(path):
+    """Parse a XML file with defusedxml and return its etree object."""
+    return ET.parse(path)
+
+
+def _strip_extension(filename):
+    """Return a file name without its extension."""
+    return os.path.splitext(filename)[0]
+
+
+register_reader('csv', '*.[cC][sS][vV]', _csv_file)
+register_reader('xls', '*.[xX][lL][sS]', _xls_file)
+register_reader('xlsx', '*.[xX][lL][sS][xX]', _xls_file)
+register_reader('px', '*.px', _px_file, key=_strip_extension)
+register_reader('txt', '*.[tT][xX][tT]', _txt_file, prepare=_prepare_txt)
+register_reader('sql', '*.sql', _sql_file, key=_strip_extension)
+register_reader('xml', '*.[xXkK][mMtTjJ][lLrRbB]', _xml_file)
+register_reader('html', '*.[hH][tT][mM][lL]', _html_table_file)
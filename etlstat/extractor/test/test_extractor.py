@@ -3,12 +3,47 @@
 """Unit tests for etlstat."""
 
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
 import etlstat.extractor.extractor as extractor
 
+from defusedxml import EntitiesForbidden
+
+import Levenshtein
+
+import numpy as np
+
+import openpyxl
+
 import pandas as pd
 
+import requests
+
+
+class QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    """File server handler that does not log requests to stderr."""
+
+    def log_message(self, format, *args):
+        """Discard the request log."""
+
+
+def corrupt_cache(cache_dir):
+    """Overwrite the cached dataframes in a cache directory with junk."""
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if name.endswith('.feather'):
+                with open(os.path.join(root, name), 'wb') as feather_file:
+                    feather_file.write(b'not a feather file')
+
 
 class TestExtractor(unittest.TestCase):
     """Unit tests for px."""
@@ -60,6 +95,164 @@ class TestExtractor(unittest.TestCase):
         self.assertEqual(list(data['ALOJ_SER_06_15.csv'].columns),
                          aloj_head)
 
+    def test_csv_workers(self):
+        """Should read CSV files concurrently with the same result."""
+        dir_path = self.base_path + '/csv/'
+        serial = extractor.csv(dir_path, sep=";")
+        for pool in ['process', 'thread']:
+            data = extractor.csv(dir_path, sep=";", workers=2, pool=pool)
+            self.assertEqual(sorted(data), sorted(serial))
+            for name in data:
+                self.assertEqual(data[name].name, name)
+                pd.testing.assert_frame_equal(data[name], serial[name])
+        with self.assertRaises(ValueError):
+            extractor.csv(dir_path, sep=";", workers=2, pool='fork')
+
+    def test_csv_lazy(self):
+        """Should parse CSV files only on first access in lazy mode."""
+        dir_path = self.base_path + '/csv/'
+        data = extractor.csv(dir_path, sep=";", lazy=True, lru_size=1)
+        self.assertIsInstance(data, extractor.LazyData)
+        self.assertEqual(len(data), 3)
+        self.assertIn('ALOJ_SER_06_15.csv', data)
+        self.assertEqual(data.cached(), [])
+        self.assertEqual(data['AEREO_SER_06_15.csv'].shape, (2, 39))
+        self.assertEqual(data['AEREO_SER_06_15.csv'].name,
+                         'AEREO_SER_06_15.csv')
+        self.assertEqual(data['ALOJ_SER_06_15.csv'].shape, (11, 30))
+        self.assertEqual(data.cached(), ['ALOJ_SER_06_15.csv'])
+        with self.assertRaises(KeyError):
+            data['missing.csv']
+
+    def test_iter_csv(self):
+        """Should yield CSV files one at a time in name order."""
+        dir_path = self.base_path + '/csv/'
+        for prefetch in [False, True]:
+            items = list(extractor.iter_csv(dir_path, prefetch=prefetch))
+            self.assertEqual([name for name, _ in items],
+                             ['AEREO_SER_06_15.csv', 'AGENV_SER_06_15.csv',
+                              'ALOJ_SER_06_15.csv'])
+            self.assertEqual(items[2][1].shape, (11, 30))
+            self.assertEqual(items[2][1].name, 'ALOJ_SER_06_15.csv')
+
+    def test_csv_chunksize(self):
+        """Should read every CSV file as an iterator of chunks."""
+        dir_path = self.base_path + '/csv/'
+        data = extractor.csv(dir_path, chunksize=4)
+        chunks = list(data['ALOJ_SER_06_15.csv'])
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 3])
+        self.assertEqual(chunks[0].name, 'ALOJ_SER_06_15.csv')
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks),
+            extractor.csv(dir_path)['ALOJ_SER_06_15.csv'])
+
+    def test_csv_cache(self):
+        """Should serve CSV files from the cache until the source changes."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dir_path = tmp_dir + '/csv/'
+            cache_dir = tmp_dir + '/cache'
+            shutil.copytree(self.base_path + '/csv/', dir_path)
+            expected = extractor.csv(dir_path)
+            cold = extractor.csv(dir_path, cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
+            warm = extractor.csv(dir_path, cache_dir=cache_dir)
+            for name in expected:
+                pd.testing.assert_frame_equal(cold[name], expected[name])
+                pd.testing.assert_frame_equal(warm[name], expected[name])
+                self.assertEqual(warm[name].name, name)
+
+            with open(dir_path + 'AEREO_SER_06_15.csv', 'a') as csv_file:
+                csv_file.write('1' + ';' * 38 + '\n')
+            changed = extractor.csv(dir_path, cache_dir=cache_dir)
+            self.assertEqual(changed['AEREO_SER_06_15.csv'].shape[0], 3)
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+    def test_csv_cache_corrupt(self):
+        """Should parse CSV files again if their cache entry is unreadable."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_dir = tmp_dir + '/cache'
+            expected = extractor.csv(self.base_path + '/csv/')
+            extractor.csv(self.base_path + '/csv/', cache_dir=cache_dir)
+            corrupt_cache(cache_dir)
+            with self.assertLogs(extractor.LOGGER, 'WARNING'):
+                data = extractor.csv(self.base_path + '/csv/',
+                                     cache_dir=cache_dir)
+            warm = extractor.csv(self.base_path + '/csv/',
+                                 cache_dir=cache_dir)
+            for name in expected:
+                pd.testing.assert_frame_equal(data[name], expected[name])
+                pd.testing.assert_frame_equal(warm[name], expected[name])
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+    def test_cache_key_sets(self):
+        """Should build the same cache key for sets in every process."""
+        code = ('from etlstat.extractor import extractor; '
+                'print(repr(extractor._cache_key_value('
+                '{"na_values": {"..", ":", "-", "n.d."}})))')
+        keys = set()
+        for seed in ('1', '2', '3'):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            keys.add(subprocess.run([sys.executable, '-c', code], env=env,
+                                    check=True, capture_output=True,
+                                    text=True).stdout)
+        self.assertEqual(len(keys), 1)
+
+    def test_match_data_format(self):
+        """Should match every data file with its most similar format."""
+        dir_path = self.base_path + '/positional/'
+        format_path = dir_path + 'format/'
+        formats = sorted(os.listdir(format_path))
+        assignation_map = extractor.match_data_format(
+            dir_path, '*.[tT][xX][tT]', format_path, '*.[cC][sS][vV]')
+        self.assertEqual(len(assignation_map), 22)
+        for data_file, format_file in assignation_map.items():
+            ratios = [Levenshtein.ratio(data_file, element)
+                      for element in formats]
+            self.assertEqual(format_file, formats[ratios.index(max(ratios))])
+        self.assertEqual(assignation_map['POST_SER_06_15.TXT'],
+                         'POST_SER.csv')
+
+    def test_format_index(self):
+        """Should prefer stem matches and reuse the index across calls."""
+        format_index = extractor.FormatIndex(
+            self.base_path + '/positional/format/')
+        assignation_map = format_index.match(['WHITE_SPACES.txt',
+                                              'TEC_SER_06_16.TXT'])
+        self.assertEqual(assignation_map, {
+            'WHITE_SPACES.txt': 'WHITE_SPACES.csv',
+            'TEC_SER_06_16.TXT': 'TEC_SER.csv'})
+        dir_path = self.base_path + '/positional/'
+        data = extractor.txt(dir_path, format_path=dir_path + 'format/',
+                             format_index=format_index)
+        self.assertEqual(data['TEC_SER_06_15.TXT'].shape[1], 44)
+        with self.assertRaises(FileNotFoundError):
+            extractor.FormatIndex(dir_path, '*.json')
+
+    def test_txt_unmatched_format(self):
+        """Should skip text files without a matching format file."""
+        dir_path = self.base_path + '/positional/'
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.mkdir(tmp_dir + '/format')
+            shutil.copy(dir_path + 'format/ALOJ_SER.csv',
+                        tmp_dir + '/format/LAYOUT')
+            shutil.copy(dir_path + 'ALOJ_SER_06_15.TXT',
+                        tmp_dir + '/LAYOUT.txt')
+            shutil.copy(dir_path + 'ALOJ_SER_06_15.TXT', tmp_dir + '/q.txt')
+            with self.assertLogs(extractor.LOGGER, 'INFO') as logs:
+                data = extractor.txt(tmp_dir, format_path=tmp_dir + '/format',
+                                     format_extension='LAYOUT*')
+            self.assertEqual(list(data), ['LAYOUT.txt'])
+            self.assertIn('q.txt', '\n'.join(logs.output))
+            errors = {}
+            extracted = extractor.extract(
+                tmp_dir, formats=['txt'], errors=errors,
+                options={'txt': {'format_path': tmp_dir + '/format',
+                                 'format_extension': 'LAYOUT*'}})
+        self.assertEqual(list(extracted['txt']), ['LAYOUT.txt'])
+        self.assertEqual(errors, {})
+        pd.testing.assert_frame_equal(extracted['txt']['LAYOUT.txt'],
+                                      data['LAYOUT.txt'])
+
     def test_txt(self):
         """Should massively read positional text files from a directory.
 
@@ -128,6 +321,135 @@ class TestExtractor(unittest.TestCase):
         self.assertEqual(list(data['TEC_SER_06_15.TXT'].dtypes), tec_type)
         self.assertEqual(data['WHITE_SPACES.TXT']['COL_1'][1], ' a ')
 
+    def test_txt_workers(self):
+        """Should read positional text files concurrently."""
+        dir_path = self.base_path + '/positional/'
+        serial = extractor.txt(dir_path, format_path=dir_path + 'format/')
+        data = extractor.txt(dir_path, format_path=dir_path + 'format/',
+                             workers=4)
+        self.assertEqual(sorted(data), sorted(serial))
+        for name in data:
+            self.assertEqual(data[name].name, name)
+            pd.testing.assert_frame_equal(data[name], serial[name])
+
+    def test_txt_numpy_engine(self):
+        """Should read positional files with numpy as pandas does."""
+        dir_path = self.base_path + '/positional/'
+        expected = extractor.txt(dir_path, format_path=dir_path + 'format/')
+        data = extractor.txt(dir_path, format_path=dir_path + 'format/',
+                             engine='numpy')
+        self.assertEqual(sorted(data), sorted(expected))
+        for name in expected:
+            pd.testing.assert_frame_equal(data[name], expected[name])
+        self.assertEqual(data['WHITE_SPACES.TXT']['COL_1'][1], ' a ')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            shutil.copy(dir_path + 'ALOJ_SER_06_15.TXT', tmp_dir)
+            open(tmp_dir + '/AEREO_SER_06_15.TXT', 'w').close()
+            expected = extractor.txt(tmp_dir, format_path=dir_path + 'format/')
+            data = extractor.txt(tmp_dir, format_path=dir_path + 'format/',
+                                 engine='numpy')
+            self.assertEqual(len(data['AEREO_SER_06_15.TXT'].index), 0)
+            for name in expected:
+                pd.testing.assert_frame_equal(data[name], expected[name])
+        with self.assertRaises(ValueError):
+            extractor.txt(dir_path, format_path=dir_path + 'format/',
+                          engine='c')
+
+    def test_read_fwf_numpy(self):
+        """Should handle short, blank and CRLF lines like read_fwf."""
+        dtype = {'a': str, 'b': str, 'c': np.float32}
+        content = b'ab   1.5\nNA   NA\n  cc NA\nx\nNA \t 2\r\n' \
+            b'abc -1\n\n  9 4\n  \n'
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = tmp_dir + '/data.txt'
+            with open(path, 'wb') as data_file:
+                data_file.write(content)
+            expected = pd.read_fwf(path, widths=[2, 3, 3],
+                                   names=['a', 'b', 'c'], dtype=dtype,
+                                   delimiter='\n\t', na_values=[-1])
+            data = extractor._read_fwf_numpy(path, [2, 3, 3],
+                                             ['a', 'b', 'c'], dtype,
+                                             na_values=[-1])
+        pd.testing.assert_frame_equal(data, expected)
+        self.assertEqual(len(data), 7)
+
+    def test_txt_compact_dtypes(self):
+        """Should read positional files with the narrowest exact types."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(tmp_dir + '/EPA.txt', 'w') as data_file:
+                data_file.write('123456789012345678 1 12.5M\n'
+                                '100000000000000001   1.25M\n'
+                                '100000000000000002-9  0.5H\n'
+                                '100000000000000003 5  1.0M\n')
+            with open(tmp_dir + '/EPA.csv', 'w') as format_file:
+                format_file.write('FIELD_NAME;DATA_TYPE;LENGTH\n'
+                                  'NORDEN;INTEGER;18\n'
+                                  'EDAD;INTEGER;2\n'
+                                  'FACTOR;DECIMAL;5\n'
+                                  'SEXO;STRING;1\n')
+            for engine in ['pandas', 'numpy']:
+                data = extractor.txt(tmp_dir + '/', engine=engine,
+                                     dtype_policy='compact')['EPA.txt']
+                self.assertEqual(list(data.dtypes.astype(str)),
+                                 ['Int64', 'Int8', 'float64', 'category'])
+                self.assertEqual(data['NORDEN'][0], 123456789012345678)
+                self.assertTrue(pd.isna(data['EDAD'][1]))
+                self.assertEqual(data['EDAD'][2], -9)
+            chunks = list(extractor.txt(tmp_dir + '/', dtype_policy='compact',
+                                        chunksize=2)['EPA.txt'])
+            self.assertEqual(str(chunks[1]['EDAD'].dtype), 'Int8')
+            self.assertEqual(chunks[1]['SEXO'].dtype, object)
+        with self.assertRaises(ValueError):
+            extractor.txt(self.base_path + '/positional/',
+                          dtype_policy='narrow')
+
+    def test_txt_lazy(self):
+        """Should parse positional text files on first access."""
+        dir_path = self.base_path + '/positional/'
+        data = extractor.txt(dir_path, format_path=dir_path + 'format/',
+                             lazy=True)
+        self.assertEqual(len(data), 22)
+        self.assertEqual(data.cached(), [])
+        self.assertEqual(data['ALOJ_SER_06_15.TXT'].shape, (11, 30))
+        self.assertEqual(data.cached(), ['ALOJ_SER_06_15.TXT'])
+
+    def test_iter_txt(self):
+        """Should yield positional text files one at a time."""
+        dir_path = self.base_path + '/positional/'
+        names = []
+        for name, data in extractor.iter_txt(
+                dir_path, format_path=dir_path + 'format/', prefetch=True):
+            names.append(name)
+            self.assertEqual(data.name, name)
+        self.assertEqual(len(names), 22)
+        self.assertEqual(names, sorted(names))
+
+    def test_txt_chunksize(self):
+        """Should read positional files in chunks keeping the dtypes."""
+        dir_path = self.base_path + '/positional/'
+        data = extractor.txt(dir_path, format_path=dir_path + 'format/',
+                             chunksize=5)
+        chunks = list(data['ALOJ_SER_06_15.TXT'])
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, 1])
+        whole = extractor.txt(dir_path, format_path=dir_path + 'format/')
+        pd.testing.assert_frame_equal(pd.concat(chunks),
+                                      whole['ALOJ_SER_06_15.TXT'])
+        self.assertEqual(list(chunks[0].dtypes),
+                         list(whole['ALOJ_SER_06_15.TXT'].dtypes))
+
+    def test_txt_cache(self):
+        """Should keep positional dtypes when read from the cache."""
+        dir_path = self.base_path + '/positional/'
+        with tempfile.TemporaryDirectory() as cache_dir:
+            expected = extractor.txt(dir_path,
+                                     format_path=dir_path + 'format/')
+            extractor.txt(dir_path, format_path=dir_path + 'format/',
+                          cache_dir=cache_dir)
+            warm = extractor.txt(dir_path, format_path=dir_path + 'format/',
+                                 cache_dir=cache_dir)
+            for name in expected:
+                pd.testing.assert_frame_equal(warm[name], expected[name])
+
     def test_xls(self):
         """Should massively read XLS files from a directory.
 
@@ -149,6 +471,81 @@ class TestExtractor(unittest.TestCase):
         self.assertEqual(type(data['excel_prueba.xls']['Hoja2']),
                          pd.core.frame.DataFrame)
 
+    def test_xls_lazy(self):
+        """Should read Excel workbooks on first access."""
+        data = extractor.xls(self.base_path + '/excel/', lazy=True)
+        self.assertEqual(sorted(data), ['excel_prueba.xls',
+                                        'prueba_excel.xls'])
+        self.assertEqual(data['prueba_excel.xls']['Hoja1'].name, 'Hoja1')
+
+    def test_xls_projection(self):
+        """Should read only the selected sheets, columns and rows."""
+        dir_path = self.base_path + '/excel/'
+        data = extractor.xlsx(dir_path, sheets=['Hoja1', 2, 'Hoja[34]'],
+                              usecols='A:C', nrows=10)
+        sheets = data['excel_prueba.xlsx']
+        self.assertEqual(list(sheets), ['Hoja1', 'Hoja3', 'Hoja4'])
+        self.assertEqual(sheets['Hoja3'].shape, (10, 3))
+        self.assertEqual(sheets['Hoja3'].name, 'Hoja3')
+        self.assertEqual(list(sheets['Hoja4'].columns[2:]), ['YOLO'])
+        data = extractor.xls(dir_path, sheets='Hoja*', nrows=5, lazy=True)
+        self.assertEqual(len(data['prueba_excel.xls']), 4)
+        with self.assertRaises(ValueError):
+            extractor.xls(dir_path, sheets='Hoja9')
+        with self.assertRaises(ValueError):
+            extractor.xls(dir_path, sheets=4, workers=1, pool='thread')
+
+    def test_xlsx_chunksize(self):
+        """Should stream XLSX sheets in chunks equal to a full read."""
+        dir_path = self.base_path + '/excel/'
+        full = extractor.xlsx(dir_path, sheets='Hoja3')
+        data = extractor.xlsx(dir_path, sheets='Hoja3', chunksize=50)
+        chunks = list(data['excel_prueba.xlsx']['Hoja3'])
+        self.assertEqual([len(chunk) for chunk in chunks], [50, 50, 50, 15])
+        self.assertEqual(chunks[0].name, 'Hoja3')
+        pd.testing.assert_frame_equal(pd.concat(chunks),
+                                      full['excel_prueba.xlsx']['Hoja3'])
+        data = extractor.xlsx(dir_path, chunksize=50, usecols=['MES', 0],
+                              nrows=60)
+        chunks = list(data['prueba_excel.xlsx']['Hoja1'])
+        self.assertEqual([chunk.shape for chunk in chunks], [(50, 2), (10, 2)])
+        self.assertEqual(list(chunks[1].columns), ['ANYO', 'MES'])
+        self.assertEqual(chunks[1].index[0], 50)
+
+    def test_xlsx_chunksize_na_values(self):
+        """Should apply per-column NA values to XLSX chunks."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        workbook = openpyxl.Workbook()
+        workbook.active.title = 'Sheet'
+        for row in [('A', 'B'), ('x', 'x'), ('y', None), ('A', 'NA')]:
+            workbook.active.append(row)
+        workbook.save(os.path.join(tmp_dir, 'na.xlsx'))
+        full = extractor.xlsx(tmp_dir, na_values={'A': ['x']})
+        data = extractor.xlsx(tmp_dir, na_values={'A': ['x']}, chunksize=2)
+        chunks = pd.concat(list(data['na.xlsx']['Sheet']))
+        pd.testing.assert_frame_equal(chunks, full['na.xlsx']['Sheet'])
+        self.assertEqual(chunks['B'].tolist()[0], 'x')
+        self.assertTrue(chunks['A'].isna().tolist()[0])
+
+    def test_iter_xlsx(self):
+        """Should yield XLSX workbooks one at a time."""
+        dir_path = self.base_path + '/excel/'
+        items = list(extractor.iter_xlsx(dir_path))
+        self.assertEqual([excel for excel, _ in items],
+                         ['excel_prueba.xlsx', 'prueba_excel.xlsx'])
+        self.assertEqual(items[0][1]['Hoja4'].shape, (165, 11))
+        for excel, sheets in extractor.iter_xlsx(dir_path, chunksize=100):
+            self.assertEqual(len(sheets), 4)
+            self.assertEqual(sum(len(chunk) for chunk in sheets['Hoja2']),
+                             165)
+
+    def test_iter_xls(self):
+        """Should yield Excel workbooks one at a time."""
+        items = dict(extractor.iter_xls(self.base_path + '/excel/'))
+        self.assertEqual(len(items['prueba_excel.xls']), 4)
+        self.assertEqual(items['excel_prueba.xls']['Hoja2'].name, 'Hoja2')
+
     def test_xlsx(self):
         """Should massively read XLSX files from a directory.
 
@@ -185,6 +582,57 @@ class TestExtractor(unittest.TestCase):
         root = xml_dict['Ec_SE_IEFAZ.ktr'].getroot()
         self.assertEqual(root.tag, 'transformation')
 
+    def test_xml_records(self):
+        """Should stream XML elements into dataframes of records."""
+        dir_path = self.base_path + '/xml/'
+        fields = {'name': 'name', 'type': 'type', 'copies': 'copies'}
+        data = extractor.xml(dir_path, record_path='/transformation/step',
+                             fields=fields)
+        steps = extractor.xml(dir_path)['Ec_SE_IEFAZ.ktr'].findall('step')
+        self.assertEqual(len(data), 11)
+        self.assertEqual(len(data['Comex.kjb']), 0)
+        self.assertEqual(data['Ec_SE_IEFAZ.ktr']['type'].tolist(),
+                         [step.findtext('type') for step in steps])
+        self.assertEqual(data['Ec_SE_IEFAZ.ktr'].name, 'Ec_SE_IEFAZ.ktr')
+        self.assertEqual(data['Ec_SE_IEFAZ.ktr']['name'].tolist(),
+                         [step.findtext('name') for step in steps])
+        chunks = list(extractor.xml(dir_path, record_path='step',
+                                    fields=fields,
+                                    chunksize=5)['Ec_SE_IEFAZ.ktr'])
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, 1])
+        self.assertEqual(chunks[0].name, 'Ec_SE_IEFAZ.ktr')
+        pd.testing.assert_frame_equal(pd.concat(chunks),
+                                      data['Ec_SE_IEFAZ.ktr'])
+
+    def test_iter_xml_records(self):
+        """Should read namespaced records with fields of their ancestors."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        filename = os.path.join(tmp_dir, 'data.xml')
+        with open(filename, 'w') as file:
+            file.write(
+                '<m:Data xmlns:m="urn:m" xmlns:g="urn:g"><m:DataSet a="R">'
+                '<g:Series><g:Key><g:Value id="GEO" value="ES13"/></g:Key>'
+                '<g:Obs t="2020"><g:Value value="1.5"/></g:Obs>'
+                '<g:Obs t="2021"><g:Value value="2.5"/></g:Obs></g:Series>'
+                '<g:Series><g:Key><g:Value id="GEO" value="ES11"/></g:Key>'
+                '<g:Obs t="2020"/></g:Series></m:DataSet></m:Data>')
+        records = extractor.iter_xml_records(
+            filename, 'g:Series/{*}Obs',
+            fields={'geo': '../g:Key/g:Value/@value', 'time': '@t',
+                    'value': 'g:Value/@value', 'action': '../../@a'},
+            namespaces={'g': 'urn:g'})
+        self.assertEqual(list(records), [
+            {'geo': 'ES13', 'time': '2020', 'value': '1.5', 'action': 'R'},
+            {'geo': 'ES13', 'time': '2021', 'value': '2.5', 'action': 'R'},
+            {'geo': 'ES11', 'time': '2020', 'value': None, 'action': 'R'}])
+        self.assertEqual(list(extractor.iter_xml_records(filename, '*/Obs')),
+                         [])
+        with open(filename, 'w') as file:
+            file.write('<!DOCTYPE d [<!ENTITY e "x">]><d><r>&e;</r></d>')
+        with self.assertRaises(EntitiesForbidden):
+            list(extractor.iter_xml_records(filename, 'r'))
+
     def test_sql(self):
         """Should massively read SQL files from a directory.
 
@@ -219,6 +667,106 @@ class TestExtractor(unittest.TestCase):
         self.assertEqual(
             type(pc_axis_data['px_o20013']), pd.core.frame.DataFrame)
 
+    def test_px_concurrent_urls(self):
+        """Should download and parse px URLs concurrently with errors."""
+        handler = partial(QuietHTTPRequestHandler,
+                          directory=self.base_path + '/px')
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f'http://127.0.0.1:{server.server_port}/'
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        filename = os.path.join(tmp_dir, 'urls.csv')
+        with open(filename, 'w') as file:
+            file.write(f'id,url\npx_o20013,{url}o20013.px\n'
+                       f'missing,{url}missing.px\npx_o20012,{url}o20012.px')
+        errors = {}
+        data = extractor.px(filename, max_concurrency=3, workers=2,
+                            errors=errors)
+        self.assertEqual(list(data), ['px_o20013', 'px_o20012'])
+        self.assertEqual(list(errors), ['missing'])
+        expected = extractor.px(self.base_path + '/px/')
+        pd.testing.assert_frame_equal(data['px_o20012'], expected['o20012'])
+        pd.testing.assert_frame_equal(data['px_o20013'], expected['o20013'])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            extractor.px(filename, max_concurrency=3)
+
+    def test_px_url_cache(self):
+        """Should revalidate cached px URLs instead of parsing them again."""
+        served = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, served)
+        for px_file in ('o20012.px', 'o20013.px'):
+            shutil.copy(os.path.join(self.base_path, 'px', px_file), served)
+        handler = partial(QuietHTTPRequestHandler, directory=served)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        filename = os.path.join(served, 'urls.csv')
+        with open(filename, 'w') as file:
+            file.write(f'id,url\npx,http://127.0.0.1:{server.server_port}/'
+                       f'o20012.px')
+        cache_dir = os.path.join(served, 'cache')
+        first = extractor.px(filename, cache_dir=cache_dir)
+        with mock.patch.object(extractor, '_px_text',
+                               wraps=extractor._px_text) as parse:
+            # not modified
+            data = extractor.px(filename, cache_dir=cache_dir)
+            pd.testing.assert_frame_equal(data['px'], first['px'])
+            # modified date, same contents
+            os.utime(os.path.join(served, 'o20012.px'), (2e9, 2e9))
+            data = extractor.px(filename, cache_dir=cache_dir)
+            pd.testing.assert_frame_equal(data['px'], first['px'])
+            self.assertEqual(parse.call_count, 0)
+            # new contents
+            shutil.copy(os.path.join(served, 'o20013.px'),
+                        os.path.join(served, 'o20012.px'))
+            os.utime(os.path.join(served, 'o20012.px'), (3e9, 3e9))
+            data = extractor.px(filename, cache_dir=cache_dir)
+            self.assertEqual(parse.call_count, 1)
+        expected = extractor.px(self.base_path + '/px/')['o20013']
+        pd.testing.assert_frame_equal(data['px'], expected)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_px_url_cache_corrupt(self):
+        """Should parse px URLs again if their cache entry is unreadable."""
+        served = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, served)
+        shutil.copy(os.path.join(self.base_path, 'px', 'o20012.px'), served)
+        handler = partial(QuietHTTPRequestHandler, directory=served)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        filename = os.path.join(served, 'urls.csv')
+        with open(filename, 'w') as file:
+            file.write(f'id,url\npx,http://127.0.0.1:{server.server_port}/'
+                       f'o20012.px')
+        cache_dir = os.path.join(served, 'cache')
+        first = extractor.px(filename, cache_dir=cache_dir)
+        with mock.patch.object(extractor, '_px_text',
+                               wraps=extractor._px_text) as parse:
+            # not modified
+            corrupt_cache(cache_dir)
+            with self.assertLogs(extractor.LOGGER, 'WARNING'):
+                data = extractor.px(filename, cache_dir=cache_dir)
+            pd.testing.assert_frame_equal(data['px'], first['px'])
+            self.assertEqual(parse.call_count, 1)
+            # modified date, same contents
+            corrupt_cache(cache_dir)
+            os.utime(os.path.join(served, 'o20012.px'), (2e9, 2e9))
+            with self.assertLogs(extractor.LOGGER, 'WARNING'):
+                data = extractor.px(filename, cache_dir=cache_dir)
+            pd.testing.assert_frame_equal(data['px'], first['px'])
+            self.assertEqual(parse.call_count, 2)
+            # rebuilt entry
+            data = extractor.px(filename, cache_dir=cache_dir)
+            pd.testing.assert_frame_equal(data['px'], first['px'])
+            self.assertEqual(parse.call_count, 2)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
     def test_px_file(self):
         """Should massively read PC-Axis files in a directory.
 
@@ -232,6 +780,76 @@ class TestExtractor(unittest.TestCase):
         self.assertEqual(
             type(pc_axis_data['27066']), pd.core.frame.DataFrame)
 
+    def test_px_numpy_engine(self):
+        """Should parse px files with the numpy engine as pyaxis does."""
+        for dir_path in ('/px_file/', '/px/'):
+            expected = extractor.px(self.base_path + dir_path)
+            data = extractor.px(self.base_path + dir_path, engine='numpy')
+            self.assertEqual(list(data), list(expected))
+            for px_file in expected:
+                pd.testing.assert_frame_equal(data[px_file],
+                                              expected[px_file])
+        with self.assertRaises(ValueError):
+            extractor.px(self.base_path + '/px/', engine='px')
+
+    def test_px_chunksize(self):
+        """Should parse px files in chunks equal to a full read."""
+        dir_path = self.base_path + '/px_file/'
+        expected = extractor.px(dir_path)['27066']
+        data = extractor.px(dir_path, chunksize=50000)
+        chunks = list(data['27066'])
+        self.assertEqual([len(chunk) for chunk in chunks],
+                         [50000, 50000, 50000, 2064])
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+        chunks = extractor._iter_px_chunks(
+            self.base_path + '/px/o20012.px', 1000, block_size=64)
+        pd.testing.assert_frame_equal(pd.concat(chunks), extractor.px(
+            self.base_path + '/px/')['o20012'])
+        with self.assertRaises(ValueError):
+            extractor.px(self.base_path + '/px/pcaxis_urls.csv',
+                         chunksize=1000)
+
+    def test_px_compact_dtypes(self):
+        """Should read px dimensions as categories and DATA as numbers."""
+        dir_path = self.base_path + '/px_file/'
+        legacy = extractor.px(dir_path)['27066']
+        data = extractor.px(dir_path, dtype_policy='compact')['27066']
+        self.assertEqual(list(data.columns), list(legacy.columns) + ['FLAG'])
+        self.assertEqual(data['DATA'].dtype, np.float64)
+        for column in list(legacy.columns[:-1]) + ['FLAG']:
+            self.assertEqual(data[column].dtype, 'category')
+            if column != 'FLAG':
+                self.assertTrue(
+                    (data[column].astype(object) == legacy[column]).all())
+        self.assertAlmostEqual(data['DATA'][29], 98.728)
+        self.assertTrue(((data['FLAG'] == 'null') ==
+                         (legacy['DATA'] == '')).all())
+        self.assertTrue(((data['FLAG'] == 'sd') ==
+                         legacy['DATA'].isna()).all())
+        self.assertTrue(data['DATA'][data['FLAG'].notna()].isna().all())
+        chunks = extractor.px(dir_path, chunksize=100000,
+                              dtype_policy='compact')['27066']
+        pd.testing.assert_frame_equal(pd.concat(chunks), data)
+
+    def test_concurrent_extraction(self):
+        """Should not change the working directory and run in threads."""
+        cwd = os.getcwd()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            csv_data = executor.submit(extractor.csv,
+                                       self.base_path + '/csv')
+            sql_data = executor.submit(extractor.sql,
+                                       self.base_path + '/sql')
+            xml_data = executor.submit(extractor.xml,
+                                       self.base_path + '/xml')
+            txt_data = executor.submit(
+                extractor.txt, self.base_path + '/positional',
+                format_path=self.base_path + '/positional/format')
+            self.assertEqual(len(csv_data.result()), 3)
+            self.assertEqual(len(sql_data.result()), 3)
+            self.assertEqual(len(xml_data.result()), 11)
+            self.assertEqual(len(txt_data.result()), 22)
+        self.assertEqual(os.getcwd(), cwd)
+
     def test_html_table(self):
         """Should massively read html files in a directory.
 
@@ -243,6 +861,15 @@ class TestExtractor(unittest.TestCase):
         self.assertEqual(type(html_table_data), dict)
         self.assertEqual(len(html_table_data), 2)
 
+    def test_html_table_workers(self):
+        """Should read html files concurrently in a thread pool."""
+        html_table_data = extractor.html_table(
+            self.base_path + '/html_table/', encoding='utf-8', workers=2,
+            pool='thread')
+        self.assertEqual(len(html_table_data), 2)
+        self.assertEqual(html_table_data['test.html'].name, 'test.html')
+        self.assertEqual(html_table_data['test.html'].shape, (2, 2))
+
     def test_html_table_file(self):
         """Should read an html file with a table, and loads the table."""
         without_thead_df = extractor._html_table_file(
@@ -257,6 +884,136 @@ class TestExtractor(unittest.TestCase):
         self.assertEqual(with_thead_df['Cantabria_Dato'][0], '96,9')
         self.assertEqual(with_thead_df.shape, (15, 6))
 
+    def test_html_table_fast_engine(self):
+        """Should read html tables with the fast engine as with bs4."""
+        dir_path = self.base_path + '/html_table/'
+        expected = extractor.html_table(dir_path, encoding='utf-8')
+        data = extractor.html_table(dir_path, encoding='utf-8',
+                                    engine='fast')
+        for file in expected:
+            pd.testing.assert_frame_equal(data[file], expected[file])
+        self.assertEqual(data['icane_economy.html']['Cantabria_Dato'][0],
+                         '96,9')
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        with open(os.path.join(tmp_dir, 'table.html'), 'w') as file:
+            file.write('<div><table><tr><td>a<!--c--></td> <td>b &amp; c'
+                       '</td><td>d</tr><tr><td>1</td><br><td>2</td><td>3'
+                       '</tr></div><table><tr><th>other</th></tr></table>')
+        for file in os.listdir(tmp_dir):
+            pd.testing.assert_frame_equal(
+                extractor._html_table_file(os.path.join(tmp_dir, file),
+                                           encoding='utf-8', engine='fast'),
+                extractor._html_table_file(os.path.join(tmp_dir, file),
+                                           encoding='utf-8'))
+        with self.assertRaises(ValueError):
+            extractor.html_table(dir_path, engine='lxml')
+
+    def test_html_table_tables(self):
+        """Should read the selected tables of every html file."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        shutil.copy(self.base_path + '/html_table/test.html', tmp_dir)
+        with open(os.path.join(tmp_dir, 'tables.html'), 'w') as file:
+            file.write('<table id="a"><tr><th>X</th></tr><tr><td>1</td></tr>'
+                       '</table><p><table class="data wide"><tr><th>Y</th>'
+                       '<th>Z</th></tr><tr><td>2</td><td>3</td></tr></table>'
+                       '<table class="data"><tr><td>K</td></tr><tr><td>4'
+                       '</td></tr></table>')
+        for engine in extractor.HTML_ENGINES:
+            data = extractor.html_table(tmp_dir, encoding='utf-8',
+                                        tables='all', workers=2,
+                                        engine=engine)
+            self.assertEqual([table.columns.tolist()
+                              for table in data['tables.html']],
+                             [['X'], ['Y', 'Z'], ['K']])
+            self.assertEqual(data['tables.html'][2]['K'][0], '4')
+            self.assertEqual(data['test.html'][0].name, 'test.html')
+            data = extractor.html_table(tmp_dir, encoding='utf-8',
+                                        tables=['.data', '#a', 9],
+                                        engine=engine)
+            self.assertEqual(len(data['tables.html']), 3)
+            self.assertEqual(data['test.html'], [])
+            data = extractor.html_table(tmp_dir, encoding='utf-8',
+                                        tables=['.wide', -1], engine=engine)
+            self.assertEqual([table.columns.tolist()
+                              for table in data['tables.html']],
+                             [['Y', 'Z'], ['K']])
+            self.assertEqual(data['test.html'][0].shape, (2, 2))
+
+    def test_extract(self):
+        """Should read a mixed directory grouping the results by format."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        os.mkdir(os.path.join(tmp_dir, 'sub'))
+        shutil.copy(self.base_path + '/csv/AEREO_SER_06_15.csv', tmp_dir)
+        shutil.copy(self.base_path + '/excel/prueba_excel.xlsx', tmp_dir)
+        shutil.copy(self.base_path + '/px/o20012.px', tmp_dir)
+        shutil.copy(self.base_path + '/sql/ratios.sql',
+                    os.path.join(tmp_dir, 'sub'))
+        data = extractor.extract(tmp_dir, workers=2)
+        self.assertEqual(list(data), list(extractor.READERS))
+        self.assertEqual(list(data['csv']), ['AEREO_SER_06_15.csv'])
+        pd.testing.assert_frame_equal(
+            data['csv']['AEREO_SER_06_15.csv'],
+            extractor.csv(self.base_path + '/csv/')['AEREO_SER_06_15.csv'])
+        self.assertEqual(data['csv']['AEREO_SER_06_15.csv'].name,
+                         'AEREO_SER_06_15.csv')
+        self.assertEqual(data['xlsx']['prueba_excel.xlsx']['Hoja1'].name,
+                         'Hoja1')
+        pd.testing.assert_frame_equal(
+            data['px']['o20012'],
+            extractor.px(self.base_path + '/px/')['o20012'])
+        self.assertEqual(data['sql'], {})
+        data = extractor.extract(tmp_dir, formats=['sql', 'px'],
+                                 recursive=True, pool='thread', workers=2)
+        self.assertEqual(list(data['sql']), [os.path.join('sub', 'ratios')])
+        self.assertEqual(list(data['px']), ['o20012'])
+        with self.assertRaises(ValueError):
+            extractor.extract(tmp_dir, formats=['doc'])
+
+    def test_extract_errors(self):
+        """Should skip unmatched text files and collect read errors."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        positional = self.base_path + '/positional/'
+        shutil.copy(positional + 'ALOJ_SER_06_15.TXT', tmp_dir)
+        shutil.copy(self.base_path + '/px/o20012.px', tmp_dir)
+        with open(os.path.join(tmp_dir, 'README.txt'), 'w') as readme:
+            readme.write('Monthly data drop.\n')
+        with open(os.path.join(tmp_dir, 'broken.html'), 'w') as html:
+            html.write('<html><body><p>No tables</p></body></html>')
+        os.mkdir(os.path.join(tmp_dir, 'sub'))
+        os.symlink(tmp_dir, os.path.join(tmp_dir, 'sub', 'loop'))
+        errors = {}
+        data = extractor.extract(tmp_dir, recursive=True, errors=errors)
+        self.assertEqual(data['txt'], {})
+        self.assertEqual(list(data['px']), ['o20012'])
+        self.assertEqual(list(errors), ['broken.html'])
+        with self.assertRaises(IndexError):
+            extractor.extract(tmp_dir, formats=['html'])
+        os.remove(os.path.join(tmp_dir, 'README.txt'))
+        data = extractor.extract(
+            tmp_dir, formats=['txt'],
+            options={'txt': {'format_path': positional + 'format/'}})
+        expected = extractor.txt(positional,
+                                 format_path=positional + 'format/')
+        pd.testing.assert_frame_equal(data['txt']['ALOJ_SER_06_15.TXT'],
+                                      expected['ALOJ_SER_06_15.TXT'])
+
+    def test_register_reader(self):
+        """Should route files to registered readers."""
+        self.addCleanup(extractor.READERS.pop, 'lines')
+        extractor.register_reader('lines', '*.sql', extractor._sql_file,
+                                  key=str.upper)
+        data = extractor.extract(self.base_path + '/sql/',
+                                 formats=['lines', 'sql'])
+        self.assertEqual(sorted(data['lines']),
+                         ['AFILIADOS.SQL', 'CONTRATOS.SQL', 'RATIOS.SQL'])
+        self.assertEqual(data['lines']['RATIOS.SQL'],
+                         extractor.sql(self.base_path + '/sql/')['ratios'])
+        self.assertEqual(data['sql'], {})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -18,6 +18,7 @@ setup(
         'pandas==1.4.*',
         'pyaxis==0.3.*',
         'python_Levenshtein==0.20.*',
+        'requests==2.*',
         'SQLAlchemy==1.4.*',
         'sqlparse==0.5.5',
         'Unidecode==1.1.*',
@@ -26,6 +27,9 @@ setup(
         'xlrd==2.0.*',
         'openpyxl==3.0.*'
     ],
+    extras_require={
+        'cache': ['pyarrow']
+    },
     test_suite='extractor.test, database.test, text.test',
     keywords=['etl', 'icane', 'statistics', 'utils'],
     classifiers=[